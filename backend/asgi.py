@@ -0,0 +1,76 @@
+"""
+ASGI entry point for the FitSense API
+
+Serves the same Flask routes from an asyncio server (uvicorn). Each request
+runs on a thread pool rather than on the event loop, and requests are split
+into two lanes with separate pools:
+
+- inference: model predictions and password hashing (assessment create,
+  update, batch, recalculate and scenarios, /api/models/<name>/predict,
+  register, login)
+- light: everything else (/api/health, /api/assessments/latest, ...)
+
+so a burst of predictions can fill its own pool without delaying health
+checks or history reads.
+
+Tables are not created here, since every worker process imports this
+module; serve.py creates them once before starting the workers.
+
+Usage:
+    python serve.py --workers 4
+    uvicorn asgi:application --workers 4   # database already initialised
+"""
+
+import os
+import re
+
+from a2wsgi import WSGIMiddleware
+
+from app import app, model_loader
+
+# Threads per lane, per worker process
+LIGHT_THREADS = int(os.environ.get('FITSENSE_ASGI_LIGHT_THREADS', 16))
+INFERENCE_THREADS = int(os.environ.get('FITSENSE_ASGI_INFERENCE_THREADS', 4))
+
+# (method, path) pairs that run model predictions or password hashing
+INFERENCE_ROUTES = [
+    ('POST', re.compile(r'^/api/assessments(/batch|/recalculate|/scenarios)?/?$')),
+    ('PUT', re.compile(r'^/api/assessments/update/?$')),
+    ('POST', re.compile(r'^/api/models/[^/]+/predict/?$')),
+    ('POST', re.compile(r'^/api/auth/(register|login)/?$')),
+]
+
+def is_inference_request(method: str, path: str) -> bool:
+    return any(method == route_method and pattern.match(path) for route_method, pattern in INFERENCE_ROUTES)
+
+
+class LaneRouter:
+    """Dispatch HTTP requests to the inference or light thread pool"""
+    
+    def __init__(self, wsgi_app, light_threads: int = LIGHT_THREADS, inference_threads: int = INFERENCE_THREADS):
+        self.light = WSGIMiddleware(wsgi_app, workers=light_threads)
+        self.inference = WSGIMiddleware(wsgi_app, workers=inference_threads)
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        
+        if scope['type'] == 'http' and is_inference_request(scope['method'], scope['path']):
+            await self.inference(scope, receive, send)
+        else:
+            await self.light(scope, receive, send)
+    
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                # Stop inference workers and batchers before the process exits
+                model_loader.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+application = LaneRouter(app)
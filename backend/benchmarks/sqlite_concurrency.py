@@ -0,0 +1,147 @@
+"""
+Read/write concurrency benchmark for the SQLite engine settings
+
+Runs writer threads committing new assessments (like POST /api/assessments)
+against reader threads fetching a user's latest assessment (like
+GET /api/assessments/latest/<user_id>) on a fresh database file, once with
+SQLAlchemy's defaults and once with performance mode (WAL, tuned pragmas,
+pooled connections), and reports throughput, latency and lock errors.
+
+Usage (from backend/):
+    python benchmarks/sqlite_concurrency.py --seconds 10 --writers 4 --readers 8
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.exc import OperationalError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from database import DEFAULT_SQLITE_PRAGMAS, engine_options, install_sqlite_pragmas
+from app import db, Assessment
+
+EXERCISES = json.dumps([{'exercise': 'Squats', 'sets': 3, 'reps': 12}, {'exercise': 'Burpees', 'sets': 2, 'reps': 15}])
+PREDICTIONS = json.dumps({'calorie_analysis': {'exercise_analysis': [{'calories_burned': 120.5}] * 4}})
+
+def percentile(samples: list, pct: float) -> float:
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+def make_engine(path: str, tuned: bool):
+    url = f"sqlite:///{path}"
+    if not tuned:
+        return create_engine(url)
+    engine = create_engine(url, **engine_options(url))
+    install_sqlite_pragmas(engine, DEFAULT_SQLITE_PRAGMAS)
+    return engine
+
+def seed(engine, users: int, rows_per_user: int):
+    db.metadata.create_all(engine)
+    rows = [
+        assessment_row(user_id) for user_id in range(1, users + 1) for _ in range(rows_per_user)
+    ]
+    with engine.begin() as connection:
+        connection.execute(insert(Assessment.__table__), rows)
+
+def assessment_row(user_id: int) -> dict:
+    return {
+        'user_id': user_id, 'name': 'Bench', 'age': 30, 'gender': 'male', 'height': 1.8, 'weight': 80.0,
+        'frequency': 3, 'duration': 1.0, 'exercises': EXERCISES, 'predictions': PREDICTIONS,
+        'created_at': datetime.utcnow()
+    }
+
+def run(engine, seconds: float, writers: int, readers: int, users: int) -> dict:
+    table = Assessment.__table__
+    latest = select(table).where(table.c.user_id == 0).order_by(table.c.created_at.desc()).limit(1)
+    stop = threading.Event()
+    results = {'write': [], 'read': [], 'write_errors': 0, 'read_errors': 0}
+    lock = threading.Lock()
+    
+    def writer():
+        latencies, errors = [], 0
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                with engine.begin() as connection:
+                    connection.execute(insert(table), [assessment_row(random.randint(1, users))])
+                latencies.append(time.perf_counter() - started)
+            except OperationalError:
+                errors += 1
+        with lock:
+            results['write'] += latencies
+            results['write_errors'] += errors
+    
+    def reader():
+        latencies, errors = [], 0
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                with engine.connect() as connection:
+                    query = latest.where(table.c.user_id == random.randint(1, users))
+                    connection.execute(query).first()
+                latencies.append(time.perf_counter() - started)
+            except OperationalError:
+                errors += 1
+        with lock:
+            results['read'] += latencies
+            results['read_errors'] += errors
+    
+    threads = [threading.Thread(target=writer) for _ in range(writers)] + \
+              [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    
+    report = {}
+    for kind in ('write', 'read'):
+        samples = results[kind]
+        report[kind] = {
+            'ops_per_s': round(len(samples) / seconds, 1),
+            'p50_ms': round(percentile(samples, 50) * 1000, 2),
+            'p95_ms': round(percentile(samples, 95) * 1000, 2),
+            'p99_ms': round(percentile(samples, 99) * 1000, 2),
+            'errors': results[f'{kind}_errors']
+        }
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare SQLite read/write concurrency before and after performance mode')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--rows-per-user', type=int, default=20)
+    args = parser.parse_args()
+    
+    reports = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for label, tuned in (('default', False), ('performance', True)):
+            engine = make_engine(os.path.join(directory, f"{label}.db"), tuned)
+            seed(engine, args.users, args.rows_per_user)
+            reports[label] = run(engine, args.seconds, args.writers, args.readers, args.users)
+            engine.dispose()
+    
+    print(f"{args.writers} writers, {args.readers} readers, {args.seconds:.0f}s, "
+          f"{args.users * args.rows_per_user} seeded assessments")
+    print(f"{'mode':<12} {'op':<6} {'ops/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for label, report in reports.items():
+        for kind, stats in report.items():
+            print(f"{label:<12} {kind:<6} {stats['ops_per_s']:>9} {stats['p50_ms']:>8} "
+                  f"{stats['p95_ms']:>8} {stats['p99_ms']:>8} {stats['errors']:>7}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+End-to-end benchmark suite for the FitSense backend
+
+Generates synthetic users and assessments (value ranges from
+create_example_models.py, exercises from EXERCISE_CODE_MAP) in a fresh
+temporary database, then runs:
+
+- micro-benchmarks: prepare_features, ModelLoader.predict and
+  calculate_calorie_analysis
+- in-process load tests of the main routes (Flask test client) at each
+  --concurrency level
+
+and reports p50/p95/p99 latency, throughput and peak RSS. Results can be
+saved as JSON and compared against a stored baseline.
+
+Usage (from backend/):
+    python benchmarks/suite.py --save-baseline benchmarks/baseline.json
+    python benchmarks/suite.py --baseline benchmarks/baseline.json --output results.json
+    python benchmarks/suite.py --only micro --iterations 2000
+    python benchmarks/suite.py --concurrency 1 8 32 --requests 400 --fail-on-regression 20
+"""
+
+import argparse
+import atexit
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+# The suite runs against its own database, never the app's
+_DB_DIR = tempfile.mkdtemp(prefix='fitsense-bench-')
+atexit.register(shutil.rmtree, _DB_DIR, ignore_errors=True)
+os.environ['FITSENSE_DATABASE_URL'] = f"sqlite:///{os.path.join(_DB_DIR, 'bench.db')}"
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from features import EXERCISE_CODE_MAP
+from app import (app, db, Assessment, User, calculate_calorie_analysis, model_loader, prepare_features,
+                 run_batch_predictions)
+
+EXERCISE_NAMES = sorted(EXERCISE_CODE_MAP)
+
+# Lower is better for latency keys, higher for throughput keys
+LATENCY_KEYS = ('p50_ms', 'p95_ms', 'p99_ms')
+THROUGHPUT_KEYS = ('ops_per_s',)
+
+def synthetic_assessment(rng: random.Random, user_id: int) -> dict:
+    """An assessment payload drawn from the ranges the example models were trained on"""
+    weight = rng.uniform(50, 110)
+    return {
+        'user_id': user_id,
+        'name': f"User {user_id}",
+        'age': rng.randint(18, 68),
+        'gender': rng.choice(['male', 'female']),
+        'height': round(rng.uniform(1.5, 2.0), 2),
+        'weight': round(weight, 1),
+        'frequency': rng.randint(1, 7),
+        'duration': round(rng.uniform(0.5, 2.5), 2),
+        'exercises': [
+            {'exercise': rng.choice(EXERCISE_NAMES), 'sets': rng.randint(5, 25), 'reps': rng.randint(50, 250)}
+            for _ in range(rng.randint(1, 5))
+        ]
+    }
+
+def percentile(samples: list, pct: float) -> float:
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def summarize(latencies: List[float], elapsed: float, errors: int = 0) -> dict:
+    return {
+        'count': len(latencies),
+        'errors': errors,
+        'ops_per_s': round(len(latencies) / elapsed, 1) if elapsed > 0 else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+def time_calls(fn: Callable[[int], object], iterations: int, warmup: int = 20) -> dict:
+    for i in range(min(warmup, iterations)):
+        fn(i)
+    latencies = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        call_started = time.perf_counter()
+        fn(i)
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def seed(users: int, assessments_per_user: int, rng: random.Random) -> List[int]:
+    """Insert users and assessment history directly; returns the user ids"""
+    db.create_all()
+    normalized = app.config['ASSESSMENT_STORAGE'] == 'normalized'
+    # Password hashing isn't under test here; login isn't part of the load mix
+    user_rows = [User(email=f"bench{i}@example.com", name=f"Bench {i}", password_hash='x') for i in range(users)]
+    db.session.add_all(user_rows)
+    db.session.commit()
+    user_ids = [user.id for user in user_rows]
+    
+    records = [synthetic_assessment(rng, user_id) for user_id in user_ids for _ in range(assessments_per_user)]
+    predictions = run_batch_predictions(records) if records else []
+    now = datetime.utcnow()
+    for i, (record, record_predictions) in enumerate(zip(records, predictions)):
+        fields = {key: value for key, value in record.items() if key != 'exercises'}
+        assessment = Assessment(created_at=now - timedelta(minutes=i), **fields)
+        assessment.set_payload(record['exercises'], record_predictions,
+                               storage='normalized' if normalized else 'json')
+        db.session.add(assessment)
+    db.session.commit()
+    return user_ids
+
+def micro_benchmarks(iterations: int, rng: random.Random) -> dict:
+    records = [synthetic_assessment(rng, 1) for _ in range(256)]
+    results = {}
+    
+    for model_name in model_loader.list_models():
+        results[f"prepare_features[{model_name}]"] = time_calls(
+            lambda i: prepare_features(records[i % len(records)], model_name), iterations
+        )
+    
+    for model_name in model_loader.list_models():
+        features = [prepare_features(record, model_name) for record in records]
+        results[f"ModelLoader.predict[{model_name}]"] = time_calls(
+            lambda i: model_loader.predict(model_name, features[i % len(features)]), iterations
+        )
+    
+    predictions = run_batch_predictions(records)
+    results['calculate_calorie_analysis'] = time_calls(
+        lambda i: calculate_calorie_analysis(records[i % len(records)], predictions[i % len(records)]), iterations
+    )
+    return results
+
+
+def load_scenarios(user_ids: List[int], rng: random.Random) -> dict:
+    """Route name -> function(client, i) issuing one request and returning the response"""
+    def pick_user(i: int) -> int:
+        return user_ids[i % len(user_ids)]
+    
+    payloads = [synthetic_assessment(rng, pick_user(i)) for i in range(512)]
+    
+    return {
+        'GET /api/health': lambda client, i: client.get('/api/health'),
+        'POST /api/auth/validate': lambda client, i: client.post('/api/auth/validate', json={'user_id': pick_user(i)}),
+        'GET /api/assessments/latest/<user_id>': lambda client, i: client.get(f"/api/assessments/latest/{pick_user(i)}"),
+        'GET /api/assessments/<user_id>?limit=20': lambda client, i: client.get(f"/api/assessments/{pick_user(i)}?limit=20"),
+        'POST /api/assessments': lambda client, i: client.post('/api/assessments', json=payloads[i % len(payloads)]),
+    }
+
+def load_test(request_fn: Callable, concurrency: int, requests: int) -> dict:
+    """Issue ``requests`` requests from ``concurrency`` threads, each with its own test client"""
+    latencies, errors = [], 0
+    lock = threading.Lock()
+    counter = iter(range(requests))
+    
+    def worker():
+        nonlocal errors
+        client = app.test_client()
+        local_latencies, local_errors = [], 0
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                break
+            started = time.perf_counter()
+            response = request_fn(client, i)
+            local_latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                local_errors += 1
+        with lock:
+            latencies.extend(local_latencies)
+            errors += local_errors
+    
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+def load_tests(user_ids: List[int], concurrency_levels: List[int], requests: int, rng: random.Random) -> dict:
+    results = {}
+    for route, request_fn in load_scenarios(user_ids, rng).items():
+        # Warm up connections, caches and lazy imports outside the measurement
+        load_test(request_fn, 1, min(20, requests))
+        for concurrency in concurrency_levels:
+            results[f"{route} @ c={concurrency}"] = load_test(request_fn, concurrency, requests)
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold_pct: float) -> List[str]:
+    """Print per-benchmark changes against a baseline; returns the regressions beyond threshold_pct"""
+    regressions = []
+    print(f"\nCompared with baseline from {baseline.get('meta', {}).get('started_at', '?')} "
+          f"(regression threshold {threshold_pct:.0f}%)")
+    for section in ('micro', 'load'):
+        for name, current in results.get(section, {}).items():
+            previous = baseline.get(section, {}).get(name)
+            if not previous:
+                continue
+            changes = []
+            for key in LATENCY_KEYS + THROUGHPUT_KEYS:
+                if not previous.get(key):
+                    continue
+                change = (current[key] - previous[key]) / previous[key] * 100
+                worse = change > threshold_pct if key in LATENCY_KEYS else change < -threshold_pct
+                changes.append(f"{key} {change:+.0f}%{' !' if worse else ''}")
+                if worse:
+                    regressions.append(f"{section}: {name} {key} {previous[key]} -> {current[key]}")
+            print(f"  {name:<60} {', '.join(changes)}")
+    return regressions
+
+def print_table(title: str, results: dict):
+    print(f"\n{title}")
+    print(f"{'benchmark':<60} {'ops/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7} {'RSS MB':>8}")
+    for name, stats in results.items():
+        print(f"{name:<60} {stats['ops_per_s']:>9} {stats['p50_ms']:>9} {stats['p95_ms']:>9} "
+              f"{stats['p99_ms']:>9} {stats['errors']:>7} {stats['peak_rss_mb']:>8}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark FitSense feature preparation, inference and API routes')
+    parser.add_argument('--only', choices=['micro', 'load'], help='Run one section only')
+    parser.add_argument('--iterations', type=int, default=1000, help='Calls per micro-benchmark')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16], help='Load test thread counts')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per route and concurrency level')
+    parser.add_argument('--users', type=int, default=200, help='Synthetic users to seed')
+    parser.add_argument('--assessments-per-user', type=int, default=10, help='Seeded history per user')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for synthetic data')
+    parser.add_argument('--output', help='Write results JSON here')
+    parser.add_argument('--save-baseline', metavar='PATH', help='Write results JSON as the new baseline')
+    parser.add_argument('--baseline', metavar='PATH', help='Compare against a stored baseline')
+    parser.add_argument('--fail-on-regression', type=float, metavar='PCT',
+                        help='Exit 1 if any latency/throughput is PCT%% worse than the baseline')
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    results = {
+        'meta': {
+            'started_at': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'models': model_loader.list_models(),
+            'args': {key: value for key, value in vars(args).items()
+                     if key not in ('output', 'save_baseline', 'baseline', 'fail_on_regression')}
+        }
+    }
+    
+    with app.app_context():
+        if args.only != 'load':
+            results['micro'] = micro_benchmarks(args.iterations, rng)
+            print_table(f"Micro-benchmarks ({args.iterations} calls each)", results['micro'])
+        
+        if args.only != 'micro':
+            seeded_at = time.perf_counter()
+            user_ids = seed(args.users, args.assessments_per_user, rng)
+            print(f"\nSeeded {len(user_ids)} users with {args.assessments_per_user} assessments each "
+                  f"in {time.perf_counter() - seeded_at:.1f}s")
+            results['load'] = load_tests(user_ids, args.concurrency, args.requests, rng)
+            print_table(f"Load tests ({args.requests} requests per route and level)", results['load'])
+    
+    results['meta']['peak_rss_mb'] = peak_rss_mb()
+    print(f"\nPeak RSS: {results['meta']['peak_rss_mb']} MB")
+    
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"Results written to {path}")
+    
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.fail_on_regression or 10)
+        if regressions and args.fail_on_regression is not None:
+            print(f"\n❌ {len(regressions)} regressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
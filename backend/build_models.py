@@ -0,0 +1,255 @@
+"""
+Build the FitSense models from a grid of candidates and promote the best one within a latency budget
+
+For each model, every candidate (random forest / extra trees across tree
+counts and depths, single decision trees, linear regression) is trained in
+parallel on the synthetic data from create_example_models.py. Each one is
+then measured on one core at a time:
+
+- holdout MAE / RMSE
+- single-row and batch prediction latency, through the engine the server
+  would use (compiled tree arrays when supported, otherwise sklearn)
+- pickle size and load time (unpickle + compile), and the .forest export
+  size and map time for tree models
+
+The most accurate candidate within the budget is written to models/<name>.pkl
+(renamed into place, so a running server's model watcher picks it up).
+
+Usage:
+    python build_models.py --dry-run
+    python build_models.py --single-row-budget-ms 0.5 --report build_report.json
+    python build_models.py --models fat_model_tuned --trees 25 50 100 --depths none 10 --export
+"""
+
+import argparse
+import json
+import os
+import pickle
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+from sklearn.ensemble import ExtraTreesRegressor, RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.model_selection import train_test_split
+from sklearn.tree import DecisionTreeRegressor
+
+from create_example_models import generate_training_data
+from export_models import export_model
+from models.mapped_forest import export_forest, load_forest
+from models.tree_engine import compile_model
+
+ESTIMATORS = {
+    'random_forest': RandomForestRegressor,
+    'extra_trees': ExtraTreesRegressor,
+    'decision_tree': DecisionTreeRegressor,
+    'linear': LinearRegression
+}
+
+def candidate_grid(estimators: List[str], tree_counts: List[int], depths: List[Optional[int]], seed: int) -> List[dict]:
+    """(estimator, params) specs for every grid point"""
+    candidates = []
+    for estimator in [name for name in ('random_forest', 'extra_trees') if name in estimators]:
+        for n_estimators in tree_counts:
+            for max_depth in depths:
+                candidates.append({'estimator': estimator, 'params': {
+                    'n_estimators': n_estimators, 'max_depth': max_depth, 'random_state': seed, 'n_jobs': 1
+                }})
+    if 'decision_tree' in estimators:
+        for max_depth in depths:
+            candidates.append({'estimator': 'decision_tree', 'params': {'max_depth': max_depth, 'random_state': seed}})
+    if 'linear' in estimators:
+        candidates.append({'estimator': 'linear', 'params': {}})
+    return candidates
+
+def candidate_name(spec: dict) -> str:
+    params = ','.join(f"{key}={value}" for key, value in spec['params'].items() if key not in ('random_state', 'n_jobs'))
+    return f"{spec['estimator']}({params})"
+
+def train_candidate(spec: dict, X_train: np.ndarray, y_train: np.ndarray,
+                    X_test: np.ndarray, y_test: np.ndarray) -> dict:
+    """Fit one candidate and score it on the holdout set (runs in a worker process)"""
+    model = ESTIMATORS[spec['estimator']](**spec['params'])
+    started = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_s = time.perf_counter() - started
+    
+    errors = model.predict(X_test) - y_test
+    return {
+        'fit_s': round(fit_s, 3),
+        'mae': float(np.abs(errors).mean()),
+        'rmse': float(np.sqrt((errors ** 2).mean())),
+        'payload': pickle.dumps(model)
+    }
+
+def percentile(samples: list, pct: float) -> float:
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+def time_calls(fn, iterations: int, warmup: int = 10) -> dict:
+    for i in range(min(warmup, iterations)):
+        fn(i)
+    latencies = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        fn(i)
+        latencies.append(time.perf_counter() - started)
+    return {
+        'p50_ms': round(percentile(latencies, 50) * 1000, 4),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 4),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 4)
+    }
+
+def measure_candidate(payload: bytes, X_test: np.ndarray, iterations: int, batch_size: int, work_dir: str) -> dict:
+    """Load time, artifact sizes and serving latency, measured the way ModelLoader loads and predicts"""
+    started = time.perf_counter()
+    model = pickle.loads(payload)
+    compiled = compile_model(model)
+    load_ms = (time.perf_counter() - started) * 1000
+    predict = compiled.predict if compiled is not None else model.predict
+    
+    rows = [X_test[i:i + 1] for i in range(len(X_test))]
+    batch = X_test[np.arange(batch_size) % len(X_test)]
+    measurements = {
+        'engine': 'compiled' if compiled is not None else 'sklearn',
+        'pickle_bytes': len(payload),
+        'load_ms': round(load_ms, 3),
+        'single_row': time_calls(lambda i: predict(rows[i % len(rows)]), iterations),
+        'batch': time_calls(lambda i: predict(batch), max(iterations // 10, 5))
+    }
+    
+    if compiled is not None:
+        path = os.path.join(work_dir, 'candidate.forest')
+        measurements['forest_bytes'] = export_forest(compiled, path)
+        started = time.perf_counter()
+        load_forest(path)
+        measurements['forest_map_ms'] = round((time.perf_counter() - started) * 1000, 3)
+    return measurements
+
+def within_budget(result: dict, args) -> bool:
+    if result['single_row']['p95_ms'] > args.single_row_budget_ms:
+        return False
+    if args.batch_budget_ms is not None and result['batch']['p95_ms'] > args.batch_budget_ms:
+        return False
+    if args.max_size_mb is not None and result['pickle_bytes'] > args.max_size_mb * 1024 * 1024:
+        return False
+    return True
+
+def build_model(model_name: str, X: np.ndarray, y: np.ndarray, candidates: List[dict],
+                executor: ProcessPoolExecutor, args, work_dir: str) -> dict:
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=args.holdout, random_state=args.seed)
+    
+    started = time.perf_counter()
+    futures = [executor.submit(train_candidate, spec, X_train, y_train, X_test, y_test) for spec in candidates]
+    trained = [future.result() for future in futures]
+    print(f"\n{model_name}: trained {len(candidates)} candidates in {time.perf_counter() - started:.1f}s")
+    
+    # Latency is measured serially, after training, so candidates don't compete for cores
+    results = []
+    payloads: Dict[str, bytes] = {}
+    for spec, training in zip(candidates, trained):
+        name = candidate_name(spec)
+        payloads[name] = training.pop('payload')
+        result = {'candidate': name, 'estimator': spec['estimator'], **training,
+                  **measure_candidate(payloads[name], X_test, args.iterations, args.batch_size, work_dir)}
+        result['within_budget'] = within_budget(result, args)
+        results.append(result)
+    
+    eligible = [result for result in results if result['within_budget']]
+    selected = min(eligible, key=lambda result: (result['rmse'], result['single_row']['p95_ms'])) if eligible else None
+    print_table(results, selected)
+    
+    report = {'candidates': results, 'selected': selected['candidate'] if selected else None, 'promoted': False}
+    if selected is None:
+        print(f"❌ {model_name}: no candidate within budget; {model_name}.pkl left unchanged")
+        return report
+    
+    print(f"✅ {model_name}: selected {selected['candidate']} (RMSE {selected['rmse']:.4f}, "
+          f"p95 {selected['single_row']['p95_ms']} ms)")
+    if not args.dry_run:
+        promote(args.models_dir, model_name, payloads[selected['candidate']])
+        report['promoted'] = True
+        if args.export and selected['engine'] == 'compiled':
+            export_model(args.models_dir, model_name, rows=2000)
+    return report
+
+def promote(models_dir: str, model_name: str, payload: bytes):
+    os.makedirs(models_dir, exist_ok=True)
+    path = os.path.join(models_dir, f"{model_name}.pkl")
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+    print(f"   wrote {path}")
+
+def print_table(results: List[dict], selected: Optional[dict]):
+    print(f"  {'candidate':<58} {'RMSE':>8} {'MAE':>8} {'1-row p95':>10} {'batch p95':>10} {'KB':>8} {'load ms':>8}")
+    for result in sorted(results, key=lambda result: result['rmse']):
+        marker = '*' if result is selected else ('' if result['within_budget'] else '-')
+        print(f"{marker:>1} {result['candidate']:<58} {result['rmse']:>8.4f} {result['mae']:>8.4f} "
+              f"{result['single_row']['p95_ms']:>10} {result['batch']['p95_ms']:>10} "
+              f"{result['pickle_bytes'] // 1024:>8} {result['load_ms']:>8}")
+    print("  (* selected, - over budget)")
+
+def parse_depth(value: str) -> Optional[int]:
+    return None if value.lower() == 'none' else int(value)
+
+def main():
+    parser = argparse.ArgumentParser(description='Train a grid of candidate models and promote the best within budget')
+    parser.add_argument('--models', nargs='+', help='Model names to build (default: all)')
+    parser.add_argument('--models-dir', default='models', help='Where promoted .pkl files are written')
+    parser.add_argument('--estimators', nargs='+', choices=list(ESTIMATORS), default=list(ESTIMATORS),
+                        help='Estimator families to include')
+    parser.add_argument('--trees', type=int, nargs='+', default=[10, 25, 50, 100], help='Forest tree counts')
+    parser.add_argument('--depths', type=parse_depth, nargs='+', default=[None, 8, 12],
+                        help="Max tree depths ('none' for unlimited)")
+    parser.add_argument('--samples', type=int, default=1000, help='Synthetic training rows per model')
+    parser.add_argument('--holdout', type=float, default=0.2, help='Fraction of rows held out for scoring')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for data, splits and estimators')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='Parallel training processes')
+    parser.add_argument('--single-row-budget-ms', type=float, default=1.0,
+                        help='Maximum p95 single-row prediction latency')
+    parser.add_argument('--batch-budget-ms', type=float, help='Maximum p95 latency for one --batch-size batch')
+    parser.add_argument('--batch-size', type=int, default=256, help='Rows per batch latency measurement')
+    parser.add_argument('--max-size-mb', type=float, help='Maximum pickle size')
+    parser.add_argument('--iterations', type=int, default=300, help='Single-row predictions timed per candidate')
+    parser.add_argument('--report', help='Write the full report as JSON')
+    parser.add_argument('--export', action='store_true', help='Also write a verified .forest export of promoted tree models')
+    parser.add_argument('--dry-run', action='store_true', help='Report only; leave models/ unchanged')
+    args = parser.parse_args()
+    
+    data = generate_training_data(n_samples=args.samples, seed=args.seed)
+    model_names = args.models or list(data)
+    unknown = [name for name in model_names if name not in data]
+    if unknown:
+        parser.error(f"Unknown models: {', '.join(unknown)}")
+    
+    candidates = candidate_grid(args.estimators, args.trees, args.depths, args.seed)
+    report = {
+        'built_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'cpus': os.cpu_count(),
+        'budget': {'single_row_p95_ms': args.single_row_budget_ms, 'batch_p95_ms': args.batch_budget_ms,
+                   'batch_size': args.batch_size, 'max_size_mb': args.max_size_mb},
+        'models': {}
+    }
+    
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor, tempfile.TemporaryDirectory() as work_dir:
+        for model_name in model_names:
+            X, y = data[model_name]
+            report['models'][model_name] = build_model(model_name, X, y, candidates, executor, args, work_dir)
+    
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.report}")
+    
+    if any(model['selected'] is None for model in report['models'].values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
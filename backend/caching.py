@@ -0,0 +1,173 @@
+import sys
+import threading
+import time
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from serialization import body_etag
+
+
+def estimate_size(obj: Any) -> int:
+    """Approximate memory footprint of a cached value in bytes"""
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(estimate_size(k) + estimate_size(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return sys.getsizeof(obj) + sum(estimate_size(item) for item in obj)
+    if isinstance(obj, np.ndarray):
+        return sys.getsizeof(obj) + (0 if obj.base is None else obj.nbytes)
+    return sys.getsizeof(obj)
+
+
+class LRUCache:
+    """Thread-safe LRU cache with optional TTL and memory cap"""
+    
+    def __init__(self, max_entries: int = 1024, max_bytes: Optional[int] = None,
+                 ttl: Optional[float] = None, size_of: Callable[[Any], int] = estimate_size):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size_of = size_of
+        
+        # key -> (value, size in bytes, expiry as monotonic time or None)
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            
+            value, _, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def set(self, key: Hashable, value: Any) -> bool:
+        """Store a value, evicting least recently used entries; False if it can never fit"""
+        size = self.size_of(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return False
+        
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, expires_at)
+            self.current_bytes += size
+            
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self.current_bytes > self.max_bytes
+            ):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+        return True
+    
+    def pop(self, key: Hashable) -> bool:
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            return True
+    
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every entry whose key matches the predicate"""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+    
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+    
+    def _remove(self, key: Hashable):
+        _, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
+
+
+class PredictionCache(LRUCache):
+    """Prediction results keyed on (model name, model version, feature vector)"""
+    
+    def __init__(self, max_entries: int = 10000, max_bytes: Optional[int] = None,
+                 ttl: Optional[float] = None, quantize: Optional[int] = None):
+        super().__init__(max_entries=max_entries, max_bytes=max_bytes, ttl=ttl)
+        # Decimal places features are rounded to so float noise still hits
+        self.quantize = quantize
+    
+    def make_key(self, model_name: str, version: Optional[str], features: np.ndarray) -> tuple:
+        features = np.asarray(features, dtype=np.float64)
+        if self.quantize is not None:
+            # Adding 0.0 folds -0.0 into 0.0 so both hash the same
+            features = np.round(features, self.quantize) + 0.0
+        return (model_name, version, features.shape, features.tobytes())
+    
+    def invalidate_model(self, model_name: str) -> int:
+        return self.invalidate(lambda key: key[0] == model_name)
+
+
+class ResponseCache(LRUCache):
+    """Serialized response bodies and their ETags, keyed on a row id and valid for one row version"""
+    
+    def __init__(self, max_entries: int = 10000, max_bytes: Optional[int] = None, ttl: Optional[float] = None):
+        super().__init__(max_entries=max_entries, max_bytes=max_bytes, ttl=ttl)
+        self.stale = 0
+    
+    def get_body(self, key: Hashable, version: Hashable) -> Optional[Tuple[bytes, str]]:
+        entry = self.get(key)
+        if entry is None:
+            return None
+        if entry[0] != version:
+            # The row changed since it was cached; count it as a miss
+            with self._lock:
+                self.hits -= 1
+                self.misses += 1
+                self.stale += 1
+            return None
+        return entry[1], entry[2]
+    
+    def set_body(self, key: Hashable, version: Hashable, body: bytes) -> str:
+        etag = body_etag(body)
+        self.set(key, (version, body, etag))
+        return etag
+    
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats['stale'] = self.stale
+        return stats
@@ -3,13 +3,11 @@ import numpy as np
 from sklearn.linear_model import LinearRegression
 from sklearn.ensemble import RandomForestRegressor
 
-# Create example models for fat_model_tuned and water_intake_model_tuned
-def create_example_models():
-    """Create example ML models for testing"""
+def generate_training_data(n_samples: int = 1000, seed: int = 42) -> dict:
+    """Synthetic (X, y) training data per model name"""
     
     # Generate sample training data for fat_model_tuned
-    np.random.seed(42)
-    n_samples = 1000
+    np.random.seed(seed)
     
     # Features for fat_model_tuned: ['Age', 'Gender', 'Weight (kg)', 'BMI']
     X_fat = np.random.rand(n_samples, 4)
@@ -66,6 +64,21 @@ def create_example_models():
         50 + np.random.normal(0, 20, n_samples)  # noise
     )
     
+    return {
+        'fat_model_tuned': (X_fat, y_fat),
+        'water_intake_model_tuned': (X_water, y_water),
+        'burnCal_model_tuned': (X_burnCal, y_burnCal)
+    }
+
+# Create example models for fat_model_tuned and water_intake_model_tuned
+def create_example_models():
+    """Create example ML models for testing"""
+    
+    data = generate_training_data()
+    X_fat, y_fat = data['fat_model_tuned']
+    X_water, y_water = data['water_intake_model_tuned']
+    X_burnCal, y_burnCal = data['burnCal_model_tuned']
+    
     # Train models
     fat_model = RandomForestRegressor(n_estimators=50, random_state=42)
     fat_model.fit(X_fat, y_fat)
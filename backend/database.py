@@ -0,0 +1,84 @@
+import sqlite3
+from typing import Iterable, List, Optional
+
+from sqlalchemy import Table, event, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+# Applied to every new SQLite connection in performance mode
+DEFAULT_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',         # readers no longer block on the writer (and vice versa)
+    'synchronous': 'NORMAL',       # durable at checkpoints; safe with WAL
+    'busy_timeout': 5000,          # ms to wait for a lock instead of failing with "database is locked"
+    'cache_size': -64000,          # negative = KiB, i.e. ~64 MB page cache per connection
+    'mmap_size': 268435456,        # read pages through a 256 MB memory map
+    'temp_store': 'MEMORY',
+}
+
+
+def is_sqlite(database_uri: str) -> bool:
+    return database_uri.startswith('sqlite')
+
+def is_sqlite_memory(database_uri: str) -> bool:
+    return database_uri in ('sqlite://', 'sqlite:///:memory:') or 'mode=memory' in database_uri
+
+def engine_options(database_uri: str, pool_size: int = 10, max_overflow: int = 20, pool_timeout: float = 30,
+                   pool_recycle: int = 1800, busy_timeout_ms: int = 5000) -> dict:
+    """SQLALCHEMY_ENGINE_OPTIONS for a database URL: a pre-pinged connection pool per backend"""
+    if is_sqlite_memory(database_uri):
+        # Every connection to an in-memory database is a new, empty database; keep SQLAlchemy's default
+        return {}
+    
+    options = {
+        'pool_pre_ping': True,
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': pool_timeout,
+    }
+    if is_sqlite(database_uri):
+        options['poolclass'] = QueuePool
+        # Pooled connections move between request threads; sqlite3's timeout is its busy handler
+        options['connect_args'] = {'check_same_thread': False, 'timeout': busy_timeout_ms / 1000}
+    else:
+        # Server databases drop idle connections; recycle before that happens
+        options['pool_recycle'] = pool_recycle
+    return options
+
+def install_sqlite_pragmas(engine: Engine, pragmas: Optional[dict] = None):
+    """Run PRAGMA statements on every new connection the engine opens"""
+    pragmas = DEFAULT_SQLITE_PRAGMAS if pragmas is None else pragmas
+    
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+def add_missing_columns(engine: Engine, tables: Iterable[Table]) -> List[str]:
+    """ALTER TABLE ... ADD COLUMN for nullable columns that create_all doesn't add to existing tables"""
+    inspector = inspect(engine)
+    added = []
+    for table in tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing and column.nullable:
+                column_type = column.type.compile(dialect=engine.dialect)
+                with engine.begin() as connection:
+                    connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                added.append(f"{table.name}.{column.name}")
+    return added
+
+def sqlite_settings(engine: Engine) -> dict:
+    """Current values of the tuned pragmas, e.g. to confirm WAL is active"""
+    with engine.connect() as connection:
+        return {
+            name: connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+            for name in DEFAULT_SQLITE_PRAGMAS
+        }
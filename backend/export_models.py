@@ -0,0 +1,96 @@
+"""
+Export pickled tree models to memory-mapped .forest files
+
+Each supported model (random forest, extra trees, decision tree regressors)
+in the models directory is flattened, written as <name>.forest next to its
+.pkl and checked against the pickle's predictions before it replaces any
+previous export. ModelLoader maps .forest files instead of unpickling, so
+worker processes share one copy of the model pages.
+
+Usage:
+    python export_models.py
+    python export_models.py --models fat_model_tuned,burnCal_model_tuned --rows 5000
+    python export_models.py --verify-only
+
+Exits with status 1 if any export fails verification.
+"""
+
+import argparse
+import hashlib
+import os
+import pickle
+import sys
+import time
+
+from models.mapped_forest import FOREST_EXTENSION, export_forest, load_forest, verify_forest
+from models.tree_engine import compile_model
+
+def load_pickle(path: str):
+    """Unpickle a model; returns (model, version id as ModelLoader computes it)"""
+    with open(path, 'rb') as f:
+        payload = f.read()
+    return pickle.loads(payload), hashlib.sha256(payload).hexdigest()[:12]
+
+def export_model(models_dir: str, model_name: str, rows: int, verify_only: bool = False) -> bool:
+    pickle_path = os.path.join(models_dir, f"{model_name}.pkl")
+    forest_path = os.path.join(models_dir, f"{model_name}{FOREST_EXTENSION}")
+    model, version = load_pickle(pickle_path)
+    
+    if verify_only:
+        if not os.path.exists(forest_path):
+            print(f"- {model_name}: no {FOREST_EXTENSION} export")
+            return True
+        staged_path = forest_path
+    else:
+        compiled = compile_model(model)
+        if compiled is None:
+            print(f"- {model_name}: {type(model).__name__} is not supported, keeping the pickle")
+            return True
+        # Verified under a name the loader ignores, then renamed over the previous export
+        staged_path = f"{forest_path}.verify"
+        export_forest(compiled, staged_path, source_version=version, model_type=type(model).__name__)
+    
+    started = time.perf_counter()
+    forest = load_forest(staged_path)
+    map_ms = (time.perf_counter() - started) * 1000
+    result = verify_forest(model, forest, n_rows=rows)
+    if forest.source_version != version:
+        result['ok'] = False
+        print(f"✗ {model_name}: exported from version {forest.source_version}, pickle is {version}")
+    
+    status = '✓' if result['ok'] else '✗'
+    print(f"{status} {model_name}: {os.path.getsize(pickle_path)} -> {os.path.getsize(staged_path)} bytes, "
+          f"mapped in {map_ms:.2f} ms, {result['mismatches']}/{result['rows']} mismatches "
+          f"(max diff {result['max_abs_diff']:.3g})")
+    
+    if not verify_only:
+        del forest
+        if result['ok']:
+            os.replace(staged_path, forest_path)
+        else:
+            os.remove(staged_path)
+    return result['ok']
+
+def main():
+    parser = argparse.ArgumentParser(description='Export pickled tree models to memory-mapped .forest files')
+    parser.add_argument('--models-dir', default='models', help='Directory containing the .pkl files')
+    parser.add_argument('--models', default='', help='Comma-separated model names (default: all)')
+    parser.add_argument('--rows', type=int, default=2000, help='Synthetic rows compared during verification')
+    parser.add_argument('--verify-only', action='store_true', help='Check existing exports without rewriting them')
+    args = parser.parse_args()
+    
+    names = [name.strip() for name in args.models.split(',') if name.strip()]
+    if not names:
+        names = sorted(filename[:-4] for filename in os.listdir(args.models_dir) if filename.endswith('.pkl'))
+    
+    ok = True
+    for model_name in names:
+        try:
+            ok = export_model(args.models_dir, model_name, args.rows, args.verify_only) and ok
+        except Exception as e:
+            print(f"✗ {model_name}: {e}")
+            ok = False
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import numpy as np
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# Exercise Code Mapping
+EXERCISE_CODE_MAP = {
+    'Decline Push-ups': 12, 'Bear Crawls': 0, 'Dips': 13, 'Mountain Climbers': 28,
+    'Bicep Curls': 2, 'Leg Press': 25, 'Thrusters': 47, 'Turkish Get-ups': 50,
+    'Glute Bridges': 18, 'Step-ups': 45, 'Plank': 30, 'Pull-ups': 34,
+    'Lunges': 27, 'Plyo Squats': 31, 'Squats': 44, 'Frog Jumps': 17,
+    'Deadlifts': 11, 'Prone Cobras': 33, 'Lat Pulldowns': 23, 'Russian Twists': 40,
+    'Shoulder Press': 43, 'Tricep Dips': 48, 'Kettlebell Swings': 22, 'Resistance Band Pull-Aparts': 37,
+    'Leg Raises': 26, 'Tricep Extensions': 49, 'Dead Bugs': 9, 'Scissors Kicks': 41,
+    'Plyometric Push-ups': 32, 'Push Ups': 35, 'Bench Press': 1, 'Inverted Rows': 20,
+    'Seated Rows': 42, 'Calf Raises': 8, 'Reverse Lunges': 38, 'Deadlift': 10,
+    'Wall Angels': 51, 'Lateral Raises': 24, 'Face Pulls': 15, 'Burpees': 7,
+    'Box Jumps': 5, 'Rows': 39, 'Bird Dogs': 4, 'Dragon Flags': 14,
+    'Bicycle Crunches': 3, 'Flutter Kicks': 16, 'Bulgarian Split Squats': 6, 'Superman': 46,
+    'Incline Push-ups': 19, 'Jumping Jacks': 21, 'Renegade Rows': 36, 'Windshield Wipers': 52,
+    'Zottman Curls': 53, 'Pistol Squats': 29
+}
+
+def ideal_fat_percentage(age: int, gender: str) -> int:
+    gender = gender.lower()
+    if gender == "male":
+        if age <= 25: return 15
+        elif age <= 35: return 16
+        elif age <= 45: return 17
+        elif age <= 55: return 18
+        elif age <= 65: return 19
+        else: return 20
+    else:
+        if age <= 25: return 22
+        elif age <= 35: return 24
+        elif age <= 45: return 25
+        elif age <= 55: return 27
+        elif age <= 65: return 28
+        else: return 30
+
+
+# Derived features: each column name maps to a function of the raw assessment dict
+def _age(data: dict) -> float:
+    return int(data.get('age', 0))
+
+def _height(data: dict) -> float:
+    # Height is already in meters from frontend
+    return float(data.get('height', 0))
+
+def _weight(data: dict) -> float:
+    return float(data.get('weight', 0))
+
+def _bmi(data: dict) -> float:
+    # BMI: weight(kg) / height(m)^2
+    height_m = _height(data)
+    return _weight(data) / (height_m ** 2) if height_m > 0 else 0
+
+def _gender(data: dict) -> float:
+    # Gender encoding: 1 for male, 0 for female
+    return 1 if data.get('gender', '').lower() == 'male' else 0
+
+def _fat_percentage(data: dict) -> float:
+    # Use predicted fat percentage if available, otherwise use ideal fat percentage
+    if 'predicted_fat_percentage' in data:
+        return data['predicted_fat_percentage']
+    return ideal_fat_percentage(_age(data), data.get('gender', ''))
+
+def _session_duration(data: dict) -> float:
+    return float(data.get('duration', 0))
+
+def _total_sets(data: dict) -> float:
+    return sum(int(ex.get('sets', 0)) for ex in data.get('exercises', []) if ex.get('sets'))
+
+def _total_reps(data: dict) -> float:
+    return sum(int(ex.get('reps', 0)) for ex in data.get('exercises', []) if ex.get('reps'))
+
+def _exercise_code(data: dict) -> float:
+    # Use the first exercise if multiple, or 0 if none
+    exercises = data.get('exercises', [])
+    if exercises and exercises[0].get('exercise'):
+        return EXERCISE_CODE_MAP.get(exercises[0]['exercise'], 0)
+    return 0
+
+FEATURE_DERIVATIONS: Dict[str, Callable[[dict], float]] = {
+    'Age': _age,
+    'Height (m)': _height,
+    'Weight (kg)': _weight,
+    'BMI': _bmi,
+    'Gender': _gender,
+    'Fat_Percentage': _fat_percentage,
+    'Session_Duration (hours)': _session_duration,
+    'Sets': _total_sets,
+    'Reps': _total_reps,
+    'Exercise_Code': _exercise_code,
+}
+
+# Columns a scenario sweep can set per row: column -> (sweep field, fn(base assessment, per-row field values))
+SWEEP_COLUMNS: Dict[str, tuple] = {
+    'Weight (kg)': ('weight', lambda base, values: values),
+    'BMI': ('weight', lambda base, values: values / (_height(base) ** 2) if _height(base) > 0 else np.zeros_like(values)),
+    'Fat_Percentage': ('predicted_fat_percentage', lambda base, values: values),
+    'Session_Duration (hours)': ('duration', lambda base, values: values),
+    'Sets': ('total_sets', lambda base, values: values),
+    'Reps': ('total_reps', lambda base, values: values),
+}
+
+
+class FeatureSchema:
+    """Ordered feature columns for one model, written straight into float64 buffers"""
+    
+    def __init__(self, model_name: str, columns: List[str]):
+        unknown = [column for column in columns if column not in FEATURE_DERIVATIONS]
+        if unknown:
+            raise ValueError(f"Unknown feature columns for {model_name}: {unknown}")
+        
+        self.model_name = model_name
+        self.columns = list(columns)
+        self._derivations = [FEATURE_DERIVATIONS[column] for column in columns]
+    
+    @property
+    def n_features(self) -> int:
+        return len(self.columns)
+    
+    def column_index(self, column: str) -> int:
+        return self.columns.index(column)
+    
+    def fill_row(self, assessment_data: dict, out: np.ndarray) -> np.ndarray:
+        """Write one assessment's features into a preallocated row"""
+        out[:] = [derive(assessment_data) for derive in self._derivations]
+        return out
+    
+    def vectorize(self, records: Sequence[dict], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Build an (N, n_features) matrix for N assessments"""
+        shape = (len(records), self.n_features)
+        if out is None:
+            out = np.empty(shape, dtype=np.float64)
+        elif out.shape != shape:
+            raise ValueError(f"Output buffer has shape {out.shape}, expected {shape}")
+        
+        for i, record in enumerate(records):
+            self.fill_row(record, out[i])
+        return out
+    
+    def vectorize_one(self, assessment_data: dict, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Build a (1, n_features) matrix for a single assessment"""
+        return self.vectorize([assessment_data], out)
+    
+    def vectorize_sweep(self, base: dict, fields: Dict[str, np.ndarray], n_rows: int) -> np.ndarray:
+        """(n_rows, n_features) matrix of the base assessment with SWEEP_COLUMNS fields varied per row"""
+        out = np.repeat(self.vectorize_one(base), n_rows, axis=0)
+        for i, column in enumerate(self.columns):
+            sweep = SWEEP_COLUMNS.get(column)
+            if sweep is not None and sweep[0] in fields:
+                out[:, i] = sweep[1](base, np.asarray(fields[sweep[0]], dtype=np.float64))
+        return out
+    
+    def as_frame(self, matrix: np.ndarray):
+        """Named-column view of a feature matrix"""
+        import pandas as pd
+        return pd.DataFrame(matrix, columns=self.columns, copy=False)
+    
+    def model_input(self, matrix: np.ndarray, model: Any):
+        """Feature matrix in the form a model expects: named only if fitted with names"""
+        if getattr(model, 'feature_names_in_', None) is not None:
+            return self.as_frame(matrix)
+        return matrix
+
+
+FEATURE_SCHEMAS: Dict[str, FeatureSchema] = {}
+
+def register_schema(model_name: str, columns: List[str]) -> FeatureSchema:
+    """Declare the ordered feature columns a model was trained on"""
+    schema = FeatureSchema(model_name, columns)
+    FEATURE_SCHEMAS[model_name] = schema
+    return schema
+
+def get_schema(model_name: Optional[str] = None) -> FeatureSchema:
+    """Schema for a model, defaulting to the fat_model_tuned layout"""
+    return FEATURE_SCHEMAS.get(model_name, FEATURE_SCHEMAS['fat_model_tuned'])
+
+
+register_schema('fat_model_tuned', ['Age', 'Gender', 'Weight (kg)', 'BMI'])
+register_schema('water_intake_model_tuned', [
+    'Age', 'Height (m)', 'Weight (kg)', 'Gender', 'Fat_Percentage', 'Session_Duration (hours)'
+])
+register_schema('burnCal_model_tuned', [
+    'Age', 'Height (m)', 'Weight (kg)', 'Gender', 'Fat_Percentage', 'Session_Duration (hours)',
+    'Sets', 'Reps', 'Exercise_Code'
+])
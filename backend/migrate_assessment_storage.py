@@ -0,0 +1,70 @@
+"""
+Convert stored assessments between JSON text columns and normalized rows
+
+Creates the assessment_exercise / assessment_prediction tables, new
+columns and the (user_id, created_at) index if they are missing, then
+rewrites existing assessments in id order, committing every --batch-size
+rows so it can be stopped and re-run.
+
+Usage:
+    python migrate_assessment_storage.py --to normalized
+    python migrate_assessment_storage.py --to json
+"""
+
+import argparse
+import time
+
+from app import app, db, create_tables, Assessment, AssessmentExercise, AssessmentPrediction
+
+def create_schema():
+    """Create new tables, and columns and indexes that create_all skips on existing tables"""
+    create_tables()
+    for model in (Assessment, AssessmentExercise, AssessmentPrediction):
+        for index in model.__table__.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+
+def migrate(storage: str, batch_size: int = 500, dry_run: bool = False) -> int:
+    """Rewrite every assessment not yet in the target storage mode; returns how many changed"""
+    to_normalized = storage == 'normalized'
+    converted = 0
+    last_id = 0
+    started = time.time()
+    
+    while True:
+        batch = Assessment.query.filter(Assessment.id > last_id).order_by(Assessment.id).limit(batch_size).all()
+        if not batch:
+            break
+        
+        for assessment in batch:
+            if assessment.is_normalized != to_normalized:
+                assessment.set_payload(assessment.get_exercises(), assessment.get_predictions(), storage=storage)
+                # Other processes' response caches only notice a new revision
+                assessment.revision = (assessment.revision or 0) + 1
+                converted += 1
+        last_id = batch[-1].id
+        
+        if dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+        print(f"Processed up to assessment {last_id}: {converted} converted ({time.time() - started:.1f}s)")
+    
+    return converted
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert assessment storage between JSON and normalized tables')
+    parser.add_argument('--to', choices=['normalized', 'json'], default='normalized', help='Target storage mode')
+    parser.add_argument('--batch-size', type=int, default=500, help='Assessments per transaction')
+    parser.add_argument('--dry-run', action='store_true', help='Convert without committing')
+    args = parser.parse_args()
+    
+    with app.app_context():
+        create_schema()
+        converted = migrate(args.to, batch_size=args.batch_size, dry_run=args.dry_run)
+    
+    print(f"✅ {converted} assessments converted to {args.to} storage{' (dry run)' if args.dry_run else ''}")
+    if args.to == 'normalized':
+        print("Set FITSENSE_ASSESSMENT_STORAGE=normalized so new assessments are stored the same way")
+
+if __name__ == "__main__":
+    main()
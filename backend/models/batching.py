@@ -0,0 +1,141 @@
+import threading
+import time
+import numpy as np
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Tuple
+
+# Upper bounds (microseconds) of the queueing delay histogram buckets
+QUEUE_DELAY_BUCKETS_US = (50, 100, 250, 500, 1000, 2500, 5000, 10000, float('inf'))
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-row predictions for one model into batched calls.
+    
+    Callers enqueue a row and block on a future. A worker thread flushes the
+    queue when it reaches ``max_batch_size`` rows or when the oldest row has
+    waited ``max_wait_us`` microseconds, runs one vectorized prediction per
+    distinct ``key`` in the batch and hands each caller its own row of the
+    result.
+    """
+    
+    def __init__(self, predict_fn: Callable[[np.ndarray, Any], np.ndarray],
+                 max_batch_size: int = 32, max_wait_us: int = 500, name: str = 'model'):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_us / 1_000_000
+        self.name = name
+        
+        # (row, future, enqueue time, key)
+        self._pending: List[Tuple[np.ndarray, Future, float, Any]] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.rows = 0
+        self.batch_sizes: Dict[int, int] = {}
+        self.queue_delay_sum_us = 0.0
+        self.queue_delay_max_us = 0.0
+        self.queue_delay_buckets = [0] * len(QUEUE_DELAY_BUCKETS_US)
+        
+        self._worker = threading.Thread(target=self._run, name=f"batcher-{name}", daemon=True)
+        self._worker.start()
+    
+    def submit(self, row: np.ndarray, key: Any = None) -> Future:
+        """Queue a single (1, n_features) row and return a future for its prediction
+        
+        Rows are only batched with rows submitted under the same key, which is
+        passed through to predict_fn.
+        """
+        future: Future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"Batcher for '{self.name}' is closed")
+            self._pending.append((row, future, time.perf_counter(), key))
+            # Wake the worker when a new batch starts or the current one is full
+            if len(self._pending) == 1 or len(self._pending) >= self.max_batch_size:
+                self._cond.notify()
+        return future
+    
+    def predict(self, row: np.ndarray, key: Any = None) -> np.ndarray:
+        return self.submit(row, key).result()
+    
+    def close(self):
+        """Stop accepting rows; queued rows are still flushed"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._worker.join()
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                
+                deadline = self._pending[0][2] + self.max_wait
+                while len(self._pending) < self.max_batch_size and not self._closed:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                
+                batch = self._pending[:self.max_batch_size]
+                del self._pending[:self.max_batch_size]
+            
+            self._flush(batch)
+    
+    def _flush(self, batch: List[Tuple[np.ndarray, Future, float, Any]]):
+        started = time.perf_counter()
+        self._record(len(batch), [(started - enqueued) * 1_000_000 for _, _, enqueued, _ in batch])
+        
+        groups: Dict[Any, List[Tuple[np.ndarray, Future]]] = {}
+        for row, future, _, key in batch:
+            groups.setdefault(key, []).append((row, future))
+        
+        for key, group in groups.items():
+            try:
+                predictions = self.predict_fn(np.concatenate([row for row, _ in group]), key)
+                if predictions is None:
+                    raise RuntimeError(f"Batched prediction with '{self.name}' failed")
+            except Exception as e:
+                for _, future in group:
+                    future.set_exception(e)
+                continue
+            
+            for i, (_, future) in enumerate(group):
+                future.set_result(predictions[i:i + 1])
+    
+    def _record(self, batch_size: int, delays_us: List[float]):
+        with self._stats_lock:
+            self.batches += 1
+            self.rows += batch_size
+            self.batch_sizes[batch_size] = self.batch_sizes.get(batch_size, 0) + 1
+            for delay in delays_us:
+                self.queue_delay_sum_us += delay
+                self.queue_delay_max_us = max(self.queue_delay_max_us, delay)
+                for i, bound in enumerate(QUEUE_DELAY_BUCKETS_US):
+                    if delay <= bound:
+                        self.queue_delay_buckets[i] += 1
+                        break
+    
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_us': self.max_wait * 1_000_000,
+                'batches': self.batches,
+                'rows': self.rows,
+                'avg_batch_size': round(self.rows / self.batches, 2) if self.batches else 0.0,
+                'batch_size_distribution': dict(sorted(self.batch_sizes.items())),
+                'queue_delay_us': {
+                    'avg': round(self.queue_delay_sum_us / self.rows, 1) if self.rows else 0.0,
+                    'max': round(self.queue_delay_max_us, 1),
+                    'buckets': {
+                        ('+Inf' if bound == float('inf') else str(bound)): count
+                        for bound, count in zip(QUEUE_DELAY_BUCKETS_US, self.queue_delay_buckets)
+                    },
+                },
+            }
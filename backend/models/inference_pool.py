@@ -0,0 +1,239 @@
+import atexit
+import gc
+import itertools
+import multiprocessing
+import threading
+from concurrent.futures import Future, TimeoutError
+from typing import Any, Dict, List, Tuple
+
+
+class PoolUnavailable(Exception):
+    """The pool couldn't serve a request; the caller should predict in-process"""
+
+
+def _worker_main(loader: Any, request_queue, result_queue):
+    """Worker loop: predict with the model versions inherited from the parent at fork time"""
+    # The parent is multithreaded; replace the loader locks another thread may have held at fork time
+    loader.reset_after_fork()
+    while True:
+        message = request_queue.get()
+        if message is None:
+            return
+        
+        request_id, model_name, version_id, data = message
+        version = loader.find_version(model_name, version_id)
+        if version is None:
+            # Version was loaded after this worker forked
+            result_queue.put((request_id, False, 'stale'))
+            continue
+        
+        try:
+            result_queue.put((request_id, True, loader._predict_now(version, data)))
+        except Exception as e:
+            result_queue.put((request_id, False, str(e)))
+
+
+class _Worker:
+    def __init__(self, slot: int, process, request_queue):
+        self.slot = slot
+        self.process = process
+        self.request_queue = request_queue
+        self.outstanding: set = set()
+
+
+class InferencePool:
+    """Forked worker processes that run predictions outside the request thread's GIL.
+    
+    Workers are forked after models are loaded, so the model arrays are shared
+    copy-on-write with the parent instead of being unpickled per worker.
+    Replacements are forked while other threads run, so each worker starts
+    with ModelLoader.reset_after_fork(), which replaces the locks it could
+    have inherited held.
+    Requests go to the worker with the fewest in-flight predictions; dead
+    workers are replaced, and all workers are recycled (rolling) after a new
+    model version is activated so they pick it up.
+    """
+    
+    def __init__(self, loader: Any, workers: int = 2, request_timeout: float = 5.0,
+                 health_interval: float = 1.0):
+        # Sharing loaded models relies on fork; spawn would re-load them per worker
+        self._ctx = multiprocessing.get_context('fork')
+        self.loader = loader
+        self.n_workers = workers
+        self.request_timeout = request_timeout
+        self.health_interval = health_interval
+        
+        self._result_queue = self._ctx.Queue()
+        self._lock = threading.Lock()
+        self._pending: Dict[int, Tuple[Future, _Worker]] = {}
+        self._request_ids = itertools.count()
+        self._workers: List[_Worker] = []
+        self._retiring: List[_Worker] = []
+        self._restart_requested = threading.Event()
+        self._stop = threading.Event()
+        self._closed = False
+        
+        self.requests = 0
+        self.failures = 0
+        self.worker_restarts = 0
+        self.recycles = 0
+        
+        for slot in range(workers):
+            self._workers.append(self._spawn(slot))
+        
+        self._dispatcher = threading.Thread(target=self._dispatch, name='inference-dispatch', daemon=True)
+        self._dispatcher.start()
+        self._monitor = threading.Thread(target=self._watch_workers, name='inference-health', daemon=True)
+        self._monitor.start()
+        atexit.register(self.shutdown)
+    
+    def _spawn(self, slot: int) -> _Worker:
+        # Keep pre-fork objects out of the cyclic GC so children don't touch (and copy) their pages
+        if hasattr(gc, 'freeze'):
+            gc.freeze()
+        request_queue = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(self.loader, request_queue, self._result_queue),
+            name=f"inference-worker-{slot}",
+            daemon=True
+        )
+        process.start()
+        return _Worker(slot, process, request_queue)
+    
+    def predict(self, version: Any, data) -> Any:
+        """Run a prediction on a worker; raises PoolUnavailable if it can't"""
+        with self._lock:
+            if self._closed:
+                raise PoolUnavailable("Inference pool is shut down")
+            workers = [worker for worker in self._workers if worker.process.is_alive()]
+            if not workers:
+                raise PoolUnavailable("No live inference workers")
+            
+            worker = min(workers, key=lambda w: len(w.outstanding))
+            request_id = next(self._request_ids)
+            future: Future = Future()
+            self._pending[request_id] = (future, worker)
+            worker.outstanding.add(request_id)
+            self.requests += 1
+            # Enqueued under the lock so _recycle can't send the worker its stop sentinel first
+            worker.request_queue.put((request_id, version.model_name, version.version, data))
+        
+        try:
+            return future.result(timeout=self.request_timeout)
+        except TimeoutError:
+            with self._lock:
+                self._pending.pop(request_id, None)
+                worker.outstanding.discard(request_id)
+                self.failures += 1
+            raise PoolUnavailable(f"Worker {worker.slot} timed out")
+    
+    def request_restart(self):
+        """Recycle all workers in the background (e.g. after a model version changes)"""
+        self._restart_requested.set()
+    
+    def _dispatch(self):
+        while True:
+            message = self._result_queue.get()
+            if message is None:
+                return
+            
+            request_id, ok, payload = message
+            with self._lock:
+                entry = self._pending.pop(request_id, None)
+                if entry is not None:
+                    entry[1].outstanding.discard(request_id)
+                    if not ok:
+                        self.failures += 1
+            if entry is None:
+                continue  # Caller already gave up
+            
+            future = entry[0]
+            if ok:
+                future.set_result(payload)
+            elif payload == 'stale':
+                future.set_exception(PoolUnavailable("Worker doesn't have this model version yet"))
+            else:
+                future.set_exception(RuntimeError(payload))
+    
+    def _watch_workers(self):
+        while not self._stop.wait(self.health_interval):
+            if self._restart_requested.is_set():
+                self._restart_requested.clear()
+                self._recycle()
+            
+            with self._lock:
+                dead = [worker for worker in self._workers if not worker.process.is_alive()]
+                # Retired workers exit once their queue drains; is_alive() also reaps them
+                exited = [worker for worker in self._retiring if not worker.process.is_alive()]
+                self._retiring = [worker for worker in self._retiring if worker.process.is_alive()]
+            
+            # Anything still assigned to an exited worker will never be answered
+            for worker in exited:
+                if worker.outstanding:
+                    self._fail_outstanding(worker, "Inference worker exited")
+            
+            for worker in dead:
+                self._fail_outstanding(worker, "Inference worker died")
+                replacement = self._spawn(worker.slot)
+                with self._lock:
+                    self._workers[worker.slot] = replacement
+                    self.worker_restarts += 1
+    
+    def _recycle(self):
+        """Rolling restart: new workers take traffic while old ones drain and exit"""
+        for slot in range(self.n_workers):
+            replacement = self._spawn(slot)
+            with self._lock:
+                old = self._workers[slot]
+                self._workers[slot] = replacement
+                self._retiring.append(old)
+                # After every request predict() already queued for the old worker
+                old.request_queue.put(None)
+        with self._lock:
+            self.recycles += 1
+    
+    def _fail_outstanding(self, worker: _Worker, reason: str):
+        with self._lock:
+            failed = [self._pending.pop(request_id, (None, None))[0] for request_id in worker.outstanding]
+            worker.outstanding.clear()
+            self.failures += len(failed)
+        for future in failed:
+            if future is not None:
+                future.set_exception(PoolUnavailable(reason))
+    
+    def shutdown(self, timeout: float = 5.0):
+        """Stop accepting requests, let workers finish and terminate stragglers"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            workers = self._workers + self._retiring
+        
+        self._stop.set()
+        self._monitor.join()
+        for worker in workers:
+            if worker.process.is_alive():
+                worker.request_queue.put(None)
+        for worker in workers:
+            worker.process.join(timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+                worker.process.join()
+            self._fail_outstanding(worker, "Inference pool is shut down")
+        
+        self._result_queue.put(None)
+        self._dispatcher.join()
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'workers': self.n_workers,
+                'alive': sum(1 for worker in self._workers if worker.process.is_alive()),
+                'in_flight': {worker.slot: len(worker.outstanding) for worker in self._workers},
+                'requests': self.requests,
+                'failures': self.failures,
+                'worker_restarts': self.worker_restarts,
+                'recycles': self.recycles,
+                'closed': self._closed
+            }
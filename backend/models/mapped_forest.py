@@ -0,0 +1,192 @@
+import json
+import mmap
+import os
+import struct
+import numpy as np
+from typing import Any, Optional
+
+from .tree_engine import CompiledForest
+
+# File layout: magic, uint32 header length, JSON header, then 64-byte aligned little-endian arrays
+MAGIC = b'FSFOREST'
+FORMAT_VERSION = 1
+FOREST_EXTENSION = '.forest'
+ALIGNMENT = 64
+
+ARRAY_NAMES = ('feature', 'threshold', 'children', 'value', 'roots')
+
+
+def float32_floor(values: np.ndarray) -> np.ndarray:
+    """Largest float32 <= each value.
+    
+    Trees compare float32 inputs with ``x <= threshold``; for a float32 x that
+    is the same test against the threshold rounded down to float32, so the
+    narrower thresholds give identical splits.
+    """
+    rounded = values.astype(np.float32)
+    too_high = rounded.astype(np.float64) > values
+    rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+    return rounded
+
+def index_dtype(max_index: int) -> np.dtype:
+    return np.dtype('<i4') if max_index < 2 ** 31 else np.dtype('<i8')
+
+def node_index_dtype(n_nodes: int) -> np.dtype:
+    """dtype for children/roots: predict() computes ``2 * node + 1`` in that dtype"""
+    return index_dtype(2 * n_nodes + 1)
+
+
+class MappedForest(CompiledForest):
+    """CompiledForest whose node arrays are read-only views of a memory-mapped .forest file.
+    
+    Stands in for the unpickled estimator as well: it exposes ``predict``,
+    ``n_features_in_`` and ``feature_names_in_``. Pages come from the OS page
+    cache, so every process mapping the same file shares one copy.
+    """
+    
+    def __init__(self, arrays: dict, header: dict, buffer: Optional[mmap.mmap] = None):
+        super().__init__(
+            feature=arrays['feature'],
+            threshold=arrays['threshold'],
+            children=arrays['children'],
+            value=arrays['value'],
+            roots=arrays['roots'],
+            max_depth=header['max_depth'],
+            n_features=header['n_features'],
+            feature_names=header['feature_names'],
+        )
+        self.header = header
+        self.source_version = header.get('source_version')
+        self._buffer = buffer  # keeps the mapping alive as long as the arrays
+    
+    @property
+    def n_features_in_(self) -> int:
+        return self.n_features
+    
+    @property
+    def feature_names_in_(self) -> Optional[np.ndarray]:
+        if self.feature_names is None:
+            return None
+        return np.asarray(self.feature_names, dtype=object)
+
+
+def export_forest(compiled: CompiledForest, path: str, source_version: Optional[str] = None,
+                  model_type: Optional[str] = None) -> int:
+    """Write a compiled forest as a .forest file; returns its size in bytes.
+    
+    Thresholds are stored as float32 (rounded down, see float32_floor) and
+    node/child indices as int32 when the child offsets fit. Leaf values stay float64.
+    The file is written next to ``path`` and renamed into place, so processes
+    that have the old file mapped keep reading it.
+    """
+    arrays = {
+        'feature': compiled.feature.astype(index_dtype(max(compiled.n_features, 1))),
+        'threshold': float32_floor(np.asarray(compiled.threshold, dtype=np.float64)),
+        'children': compiled.children.astype(node_index_dtype(compiled.n_nodes)),
+        'value': np.asarray(compiled.value, dtype='<f8'),
+        'roots': compiled.roots.astype(node_index_dtype(compiled.n_nodes)),
+    }
+    
+    header = {
+        'format_version': FORMAT_VERSION,
+        'source_version': source_version,
+        'model_type': model_type,
+        'n_trees': compiled.n_trees,
+        'n_nodes': compiled.n_nodes,
+        'max_depth': compiled.max_depth,
+        'n_features': compiled.n_features,
+        'feature_names': compiled.feature_names,
+        'arrays': {}
+    }
+    
+    # Offsets depend on the header length, which depends on the offsets; pad the header to a fixed size
+    header_size = ALIGNMENT
+    while True:
+        offset = len(MAGIC) + 4 + header_size
+        for name in ARRAY_NAMES:
+            array = arrays[name]
+            offset += -offset % ALIGNMENT
+            header['arrays'][name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+            offset += array.nbytes
+        encoded = json.dumps(header).encode('utf-8')
+        if len(encoded) <= header_size:
+            break
+        header_size = len(encoded) + -len(encoded) % ALIGNMENT
+    
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack('<I', header_size))
+            f.write(encoded.ljust(header_size))
+            for name in ARRAY_NAMES:
+                f.write(b'\0' * (header['arrays'][name]['offset'] - f.tell()))
+                f.write(np.ascontiguousarray(arrays[name]).tobytes())
+            size = f.tell()
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return size
+
+def load_forest(path: str) -> MappedForest:
+    """Memory-map a .forest file; nothing is copied until pages are touched"""
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    if buffer[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a .forest file")
+    (header_size,) = struct.unpack_from('<I', buffer, len(MAGIC))
+    start = len(MAGIC) + 4
+    header = json.loads(bytes(buffer[start:start + header_size]).decode('utf-8'))
+    if header.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported .forest format version: {header.get('format_version')}")
+    
+    arrays = {}
+    for name in ARRAY_NAMES:
+        spec = header['arrays'][name]
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape'], dtype=np.int64))
+        if spec['offset'] + count * dtype.itemsize > len(buffer):
+            raise ValueError(f"{path} is truncated")
+        arrays[name] = np.frombuffer(buffer, dtype=dtype, count=count, offset=spec['offset']).reshape(spec['shape'])
+    return MappedForest(arrays, header, buffer)
+
+def verification_rows(forest: CompiledForest, n_rows: int = 2000, seed: int = 0) -> np.ndarray:
+    """Random rows spanning each feature's split range, plus rows placed exactly on thresholds"""
+    rng = np.random.default_rng(seed)
+    is_split = forest.children[0::2] != np.arange(forest.n_nodes)
+    X = np.zeros((n_rows, forest.n_features))
+    for column in range(forest.n_features):
+        thresholds = np.asarray(forest.threshold[is_split & (forest.feature == column)], dtype=np.float64)
+        if thresholds.size == 0:
+            continue
+        low, high = thresholds.min(), thresholds.max()
+        margin = max(high - low, 1.0) * 0.1
+        X[:, column] = rng.uniform(low - margin, high + margin, n_rows)
+        # Values on and just around a threshold are where a lossy narrowing would show
+        on_split = rng.random(n_rows) < 0.25
+        picked = rng.choice(thresholds, n_rows)
+        X[on_split, column] = np.nextafter(picked[on_split], rng.choice([-np.inf, np.inf], n_rows)[on_split])
+        exact = rng.random(n_rows) < 0.1
+        X[exact, column] = picked[exact]
+    return X
+
+def verify_forest(model: Any, forest: MappedForest, n_rows: int = 2000, seed: int = 0,
+                  rtol: float = 1e-9, atol: float = 1e-9) -> dict:
+    """Compare the estimator's predictions with the mapped forest's on synthetic rows"""
+    X = verification_rows(forest, n_rows, seed)
+    data = X
+    if getattr(model, 'feature_names_in_', None) is not None:
+        import pandas as pd
+        data = pd.DataFrame(X, columns=list(model.feature_names_in_))
+    
+    expected = np.asarray(model.predict(data), dtype=np.float64)
+    actual = np.asarray(forest.predict(data), dtype=np.float64)
+    difference = np.abs(actual - expected)
+    return {
+        'rows': n_rows,
+        'max_abs_diff': float(difference.max()) if difference.size else 0.0,
+        'mismatches': int((~np.isclose(actual, expected, rtol=rtol, atol=atol)).sum()),
+        'ok': bool(np.allclose(actual, expected, rtol=rtol, atol=atol))
+    }
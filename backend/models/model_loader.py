@@ -1,61 +1,577 @@
+import hashlib
+import logging
 import pickle
 import os
-from typing import Dict, Any, Optional
+import threading
+import time
+import numpy as np
+from typing import Callable, Dict, Any, List, Optional
+
+from .batching import MicroBatcher
+from .inference_pool import InferencePool, PoolUnavailable
+from .mapped_forest import FOREST_EXTENSION, MappedForest, load_forest
+from .tree_engine import CompiledForest, compile_model
+
+logger = logging.getLogger('fitsense.models')
+
+class ModelVersion:
+    """One loaded artifact of a model; never mutated once active"""
+    
+    def __init__(self, model_name: str, version: str, model: Any, compiled: Optional[CompiledForest],
+                 path: str, mtime_ns: int, size_bytes: int, load_time_ms: float):
+        self.model_name = model_name
+        self.version = version
+        self.model = model
+        self.compiled = compiled
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size_bytes = size_bytes
+        self.load_time_ms = load_time_ms
+        self.loaded_at = time.time()
 
 class ModelLoader:
-    """Load and manage ML models from .pkl files"""
+    """Load and manage ML models from .pkl (or memory-mapped .forest) files"""
     
-    def __init__(self, models_dir: str = "models"):
+    def __init__(self, models_dir: str = "models", compiled: Optional[bool] = None,
+                 lazy: Optional[bool] = None, history_size: Optional[int] = None, mapped: Optional[bool] = None):
         self.models_dir = models_dir
-        self.models: Dict[str, Any] = {}
+        self.model_info: Dict[str, dict] = {}
+        self._model_locks: Dict[str, threading.RLock] = {}
+        self._load_listeners: List[Callable[[str, str], None]] = []
+        self._prediction_listeners: List[Callable[[str, float, bool], None]] = []
+        
+        # Versioned registry: the active version is swapped atomically, older ones kept for rollback
+        self.active: Dict[str, ModelVersion] = {}
+        self.history: Dict[str, List[ModelVersion]] = {}
+        if history_size is None:
+            history_size = int(os.environ.get('FITSENSE_MODEL_HISTORY', 3))
+        self.history_size = history_size
+        self._watcher: Optional[threading.Thread] = None
+        self._watcher_stop = threading.Event()
+        
+        # Compiled inference flattens tree ensembles into NumPy arrays at load time
+        if compiled is None:
+            compiled = os.environ.get('FITSENSE_COMPILED_INFERENCE', '1') != '0'
+        self.compiled = compiled
+        
+        # Exported .forest files are memory-mapped instead of unpickling the matching .pkl
+        if mapped is None:
+            mapped = os.environ.get('FITSENSE_MAPPED_MODELS', '1') != '0'
+        self.mapped = mapped
+        
+        # Opt-in micro-batching of concurrent single-row predictions
+        self.batchers: Dict[str, MicroBatcher] = {}
+        self.batching: Optional[Dict[str, int]] = None
+        
+        # Opt-in pool of forked worker processes that run predictions on other cores
+        self.pool: Optional[InferencePool] = None
+        
+        # Lazy mode only scans artifacts at startup and unpickles on first use
+        if lazy is None:
+            lazy = os.environ.get('FITSENSE_LAZY_MODELS', '0') == '1'
+        self.lazy = lazy
+        
         self.load_all_models()
+        
+        warmup_models = os.environ.get('FITSENSE_WARMUP_MODELS', '')
+        if warmup_models:
+            self.warm_up([name.strip() for name in warmup_models.split(',') if name.strip()])
+        
+        if os.environ.get('FITSENSE_MICRO_BATCHING', '0') == '1':
+            self.enable_batching(
+                max_batch_size=int(os.environ.get('FITSENSE_BATCH_MAX_SIZE', 32)),
+                max_wait_us=int(os.environ.get('FITSENSE_BATCH_MAX_WAIT_US', 500))
+            )
+        
+        # Forked last so the workers share every model loaded above
+        inference_workers = int(os.environ.get('FITSENSE_INFERENCE_WORKERS', 0))
+        if inference_workers > 0:
+            self.enable_process_pool(
+                workers=inference_workers,
+                request_timeout=float(os.environ.get('FITSENSE_INFERENCE_TIMEOUT', 5.0))
+            )
+        
+        watch_interval = float(os.environ.get('FITSENSE_MODEL_WATCH_INTERVAL', 0))
+        if watch_interval > 0:
+            self.start_watcher(watch_interval)
+    
+    @property
+    def models(self) -> Dict[str, Any]:
+        """Currently active estimator per model name"""
+        return {model_name: version.model for model_name, version in self.active.items()}
+    
+    @property
+    def compiled_models(self) -> Dict[str, CompiledForest]:
+        """Compiled inference engines of the active versions"""
+        return {
+            model_name: version.compiled for model_name, version in self.active.items()
+            if version.compiled is not None
+        }
+    
+    @property
+    def versions(self) -> Dict[str, str]:
+        """Active version id per model name"""
+        return {model_name: version.version for model_name, version in self.active.items()}
     
     def load_all_models(self):
-        """Load all .pkl files from the models directory"""
+        """Load all .pkl files from the models directory (or just scan them in lazy mode)"""
         if not os.path.exists(self.models_dir):
-            print(f"Models directory '{self.models_dir}' not found. Creating it...")
+            logger.info("Models directory '%s' not found. Creating it...", self.models_dir)
             os.makedirs(self.models_dir, exist_ok=True)
             return
         
-        for filename in os.listdir(self.models_dir):
-            if filename.endswith('.pkl'):
-                model_name = filename[:-4]  # Remove .pkl extension
+        for model_name in self._scan_model_names():
+            self._register_artifact(model_name)
+            if not self.lazy:
+                self.load_model(model_name)
+    
+    def _scan_model_names(self) -> List[str]:
+        """Model names with a .pkl (or, when mapping is enabled, a .forest) artifact"""
+        extensions = ('.pkl', FOREST_EXTENSION) if self.mapped else ('.pkl',)
+        names = []
+        for filename in sorted(os.listdir(self.models_dir)):
+            model_name, extension = os.path.splitext(filename)
+            if extension in extensions and model_name not in names:
+                names.append(model_name)
+        return names
+    
+    def _artifact_path(self, model_name: str) -> str:
+        """The .forest export when it exists and is at least as new as the .pkl, otherwise the .pkl"""
+        pickle_path = os.path.join(self.models_dir, f"{model_name}.pkl")
+        if self.mapped:
+            forest_path = os.path.join(self.models_dir, f"{model_name}{FOREST_EXTENSION}")
+            try:
+                forest_mtime = os.stat(forest_path).st_mtime_ns
+            except OSError:
+                return pickle_path
+            try:
+                if os.stat(pickle_path).st_mtime_ns > forest_mtime:
+                    # The pickle was replaced after the export; serve it until it is exported again
+                    return pickle_path
+            except OSError:
+                pass
+            return forest_path
+        return pickle_path
+    
+    def _register_artifact(self, model_name: str):
+        """Record a model artifact's path and size without unpickling it"""
+        model_path = self._artifact_path(model_name)
+        self._model_locks.setdefault(model_name, threading.RLock())
+        self.model_info.setdefault(model_name, {
+            'state': 'unloaded',
+            'path': model_path,
+            'size_bytes': os.path.getsize(model_path) if os.path.exists(model_path) else None,
+            'last_error': None,
+            'last_seen_mtime_ns': None
+        })
+    
+    def _build_version(self, model_name: str) -> ModelVersion:
+        """Read, unpickle and compile a model artifact without touching the active version"""
+        path = self.model_info[model_name]['path']
+        started = time.perf_counter()
+        
+        mtime_ns = os.stat(path).st_mtime_ns
+        if path.endswith(FOREST_EXTENSION):
+            return self._map_version(model_name, path, mtime_ns, started)
+        
+        with open(path, 'rb') as f:
+            payload = f.read()
+        model = pickle.loads(payload)
+        
+        compiled = None
+        if self.compiled:
+            try:
+                compiled = compile_model(model)
+            except Exception as e:
+                logger.error("❌ Error compiling model %s: %s", model_name, e)
+        
+        return ModelVersion(
+            model_name=model_name,
+            # Content hash identifies exactly which artifact produced a prediction
+            version=hashlib.sha256(payload).hexdigest()[:12],
+            model=model,
+            compiled=compiled,
+            path=path,
+            mtime_ns=mtime_ns,
+            size_bytes=len(payload),
+            load_time_ms=round((time.perf_counter() - started) * 1000, 2)
+        )
+    
+    def _map_version(self, model_name: str, path: str, mtime_ns: int, started: float) -> ModelVersion:
+        """Memory-map an exported forest; it serves as both the estimator and the compiled engine"""
+        forest = load_forest(path)
+        # Same id as the pickle it was exported from, so cached predictions stay valid
+        version_id = forest.source_version
+        if version_id is None:
+            with open(path, 'rb') as f:
+                version_id = hashlib.sha256(f.read()).hexdigest()[:12]
+        return ModelVersion(
+            model_name=model_name,
+            version=version_id,
+            model=forest,
+            compiled=forest,
+            path=path,
+            mtime_ns=mtime_ns,
+            size_bytes=os.path.getsize(path),
+            load_time_ms=round((time.perf_counter() - started) * 1000, 2)
+        )
+    
+    def _smoke_test(self, version: ModelVersion):
+        """Run a dummy prediction; raises if the artifact can't serve traffic"""
+        n_features = getattr(version.model, 'n_features_in_', None)
+        if not n_features:
+            return
+        
+        row = np.zeros((1, n_features))
+        prediction = np.asarray(self._predict_now(version, row), dtype=float)
+        if prediction.size == 0 or not np.isfinite(prediction).all():
+            raise ValueError("Smoke prediction returned no finite values")
+        
+        if version.compiled is not None and hasattr(version.model, 'predict'):
+            expected = np.asarray(version.model.predict(row), dtype=float)
+            if not np.allclose(prediction, expected):
+                raise ValueError("Compiled engine disagrees with the estimator")
+    
+    def _activate(self, model_name: str, version: ModelVersion):
+        """Atomically make a version active; in-flight requests keep their old reference"""
+        previous = self.active.get(model_name)
+        self.active[model_name] = version
+        
+        if previous is not None:
+            history = self.history.setdefault(model_name, [])
+            history.append(previous)
+            del history[:max(len(history) - self.history_size, 0)]
+        
+        info = self.model_info[model_name]
+        info.update(state='loaded', size_bytes=version.size_bytes, last_error=None)
+        
+        if self.batching is not None and model_name not in self.batchers:
+            self._start_batcher(model_name)
+        
+        # Workers only see versions that existed when they forked
+        if self.pool is not None:
+            self.pool.request_restart()
+        
+        for listener in self._load_listeners:
+            listener(model_name, version.version)
+    
+    def load_model(self, model_name: str) -> bool:
+        """Load (or reload) a single model from its .pkl file"""
+        return self.reload_model(model_name)['status'] in ('loaded', 'unchanged')
+    
+    def reload_model(self, model_name: str) -> dict:
+        """Load the artifact on disk, validate it and swap it in if it is a new version"""
+        if model_name not in self.model_info:
+            self._register_artifact(model_name)
+        with self._model_locks[model_name]:
+            return self._reload(model_name)
+    
+    def _reload(self, model_name: str) -> dict:
+        info = self.model_info[model_name]
+        current = self.active.get(model_name)
+        if current is None:
+            info['state'] = 'loading'
+        
+        try:
+            info['path'] = self._artifact_path(model_name)
+            info['last_seen_mtime_ns'] = os.stat(info['path']).st_mtime_ns
+            version = self._build_version(model_name)
+            # An export of the active pickle (or vice versa) is swapped in even though the version is the same
+            if current is not None and version.version == current.version and version.path == current.path:
+                return {'status': 'unchanged', 'version': current.version}
+            self._smoke_test(version)
+        except Exception as e:
+            info['last_error'] = str(e)
+            if current is None:
+                info['state'] = 'failed'
+            logger.error("❌ Error loading model %s: %s", model_name, e)
+            return {'status': 'failed', 'error': str(e), 'version': current.version if current else None}
+        
+        self._activate(model_name, version)
+        logger.info("✅ Loaded model: %s (version %s)", model_name, version.version)
+        return {
+            'status': 'loaded',
+            'version': version.version,
+            'previous_version': current.version if current else None
+        }
+    
+    def rollback_model(self, model_name: str, version: Optional[str] = None) -> dict:
+        """Reactivate a previously loaded version (the most recent one by default)"""
+        if model_name not in self._model_locks:
+            return {'status': 'failed', 'error': f"Model '{model_name}' not found"}
+        with self._model_locks[model_name]:
+            return self._rollback(model_name, version)
+    
+    def _rollback(self, model_name: str, version: Optional[str]) -> dict:
+        history = self.history.get(model_name, [])
+        candidates = [v for v in history if version is None or v.version == version]
+        if not candidates:
+            return {'status': 'failed', 'error': f"No previous version available for '{model_name}'"}
+        
+        target = candidates[-1]
+        history.remove(target)
+        current = self.active.get(model_name)
+        self._activate(model_name, target)
+        return {
+            'status': 'rolled_back',
+            'version': target.version,
+            'previous_version': current.version if current else None
+        }
+    
+    def check_for_updates(self) -> Dict[str, dict]:
+        """Reload every artifact whose file changed on disk, and load new ones"""
+        results = {}
+        if not os.path.exists(self.models_dir):
+            return results
+        
+        for model_name in self._scan_model_names():
+            if model_name not in self.model_info:
+                self._register_artifact(model_name)
+            
+            info = self.model_info[model_name]
+            path = self._artifact_path(model_name)
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            
+            current = self.active.get(model_name)
+            # Lazy models that were never requested are loaded on demand anyway
+            if current is None and self.lazy and info['state'] == 'unloaded':
+                continue
+            if current is not None and path == current.path and mtime_ns == current.mtime_ns:
+                continue
+            # Don't retry an artifact that already failed validation until it changes again
+            if mtime_ns == info['last_seen_mtime_ns']:
+                continue
+            
+            results[model_name] = self.reload_model(model_name)
+        return results
+    
+    def start_watcher(self, interval: float = 5.0) -> threading.Thread:
+        """Poll the models directory and hot-reload changed artifacts off the request path"""
+        def run():
+            while not self._watcher_stop.wait(interval):
                 try:
-                    model_path = os.path.join(self.models_dir, filename)
-                    with open(model_path, 'rb') as f:
-                        self.models[model_name] = pickle.load(f)
-                    print(f"✅ Loaded model: {model_name}")
+                    self.check_for_updates()
                 except Exception as e:
-                    print(f"❌ Error loading model {model_name}: {str(e)}")
+                    logger.error("❌ Error checking models for updates: %s", e)
+        
+        self.stop_watcher()
+        self._watcher_stop.clear()
+        self._watcher = threading.Thread(target=run, name='model-watcher', daemon=True)
+        self._watcher.start()
+        return self._watcher
+    
+    def stop_watcher(self):
+        if self._watcher is not None:
+            self._watcher_stop.set()
+            self._watcher.join()
+            self._watcher = None
+    
+    def _load_on_demand(self, model_name: str) -> Optional[ModelVersion]:
+        """Load a scanned model on first use; concurrent callers wait for one load"""
+        with self._model_locks[model_name]:
+            if model_name not in self.active and self.model_info[model_name]['state'] != 'failed':
+                self.load_model(model_name)
+        return self.active.get(model_name)
+    
+    def warm_up(self, model_names: Optional[List[str]] = None, background: bool = True) -> Optional[threading.Thread]:
+        """Load priority models and run a dummy prediction on each"""
+        def run():
+            for model_name in model_names or self.list_models():
+                model = self.get_model(model_name)
+                n_features = getattr(model, 'n_features_in_', None)
+                if n_features:
+                    self.predict(model_name, np.zeros((1, n_features)))
+        
+        if not background:
+            run()
+            return None
+        thread = threading.Thread(target=run, name='model-warmup', daemon=True)
+        thread.start()
+        return thread
+    
+    def describe_models(self) -> Dict[str, dict]:
+        """Load state, versions, load time and artifact size for every known model"""
+        description = {}
+        for model_name, info in self.model_info.items():
+            active = self.active.get(model_name)
+            description[model_name] = {
+                'state': info['state'],
+                'version': active.version if active else None,
+                'previous_versions': [v.version for v in reversed(self.history.get(model_name, []))],
+                'compiled': active is not None and active.compiled is not None,
+                'mapped': active is not None and isinstance(active.model, MappedForest),
+                'size_bytes': info['size_bytes'],
+                'load_time_ms': active.load_time_ms if active else None,
+                'loaded_at': active.loaded_at if active else None,
+                'last_error': info['last_error']
+            }
+        return description
+    
+    def add_load_listener(self, listener: Callable[[str, str], None]):
+        """Register a callback run with (model_name, version) whenever a version becomes active"""
+        self._load_listeners.append(listener)
+    
+    def add_prediction_listener(self, listener: Callable[[str, float, bool], None]):
+        """Register a callback run with (model_name, seconds, succeeded) after every predict call"""
+        self._prediction_listeners.append(listener)
+    
+    def get_version(self, model_name: str) -> Optional[str]:
+        """Version of the currently loaded model"""
+        version = self.get_model_version(model_name)
+        return version.version if version else None
+    
+    def get_model_version(self, model_name: str) -> Optional[ModelVersion]:
+        """Snapshot of the active version, loading it first in lazy mode"""
+        version = self.active.get(model_name)
+        if version is None and self.lazy and model_name in self.model_info:
+            version = self._load_on_demand(model_name)
+        return version
+    
+    def find_version(self, model_name: str, version_id: str) -> Optional[ModelVersion]:
+        """Active or retained version of a model by version id"""
+        active = self.active.get(model_name)
+        if active is not None and active.version == version_id:
+            return active
+        for version in self.history.get(model_name, []):
+            if version.version == version_id:
+                return version
+        return None
     
     def get_model(self, model_name: str) -> Optional[Any]:
-        """Get a specific model by name"""
-        return self.models.get(model_name)
+        """Get a specific model by name, loading it first in lazy mode"""
+        version = self.get_model_version(model_name)
+        return version.model if version else None
     
     def list_models(self) -> list:
-        """List all loaded model names"""
-        return list(self.models.keys())
-    
-    def predict(self, model_name: str, data) -> Optional[Any]:
-        """Make a prediction using a specific model"""
-        model = self.get_model(model_name)
-        if model is None:
-            print(f"Model '{model_name}' not found")
+        """List all available model names (loaded, or scanned in lazy mode)"""
+        return [
+            model_name for model_name, info in self.model_info.items()
+            if info['state'] != 'failed' or model_name in self.active
+        ]
+    
+    def enable_batching(self, max_batch_size: int = 32, max_wait_us: int = 500):
+        """Queue concurrent single-row predictions per model and run them as one batch"""
+        self.disable_batching()
+        self.batching = {'max_batch_size': max_batch_size, 'max_wait_us': max_wait_us}
+        for model_name in self.list_models():
+            self._start_batcher(model_name)
+    
+    def disable_batching(self):
+        """Flush and stop all micro-batchers"""
+        self.batching = None
+        batchers, self.batchers = self.batchers, {}
+        for batcher in batchers.values():
+            batcher.close()
+    
+    def batching_stats(self) -> Dict[str, dict]:
+        """Batch-size distribution and queueing delay per model"""
+        return {model_name: batcher.stats() for model_name, batcher in self.batchers.items()}
+    
+    def _start_batcher(self, model_name: str):
+        # Rows are grouped by the version snapshot their caller took
+        self.batchers[model_name] = MicroBatcher(
+            lambda batch, version: self._predict_routed(version, batch),
+            name=model_name,
+            **self.batching
+        )
+    
+    def enable_process_pool(self, workers: int = 2, request_timeout: float = 5.0):
+        """Fork worker processes that share the loaded models copy-on-write"""
+        self.disable_process_pool()
+        try:
+            self.pool = InferencePool(self, workers=workers, request_timeout=request_timeout)
+        except ValueError as e:
+            # No fork start method on this platform
+            logger.error("❌ Inference pool unavailable: %s", e)
+    
+    def disable_process_pool(self):
+        """Stop the worker processes; predictions run in-process again"""
+        pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.shutdown()
+    
+    def pool_stats(self) -> Optional[dict]:
+        return self.pool.stats() if self.pool is not None else None
+    
+    def reset_after_fork(self):
+        """In a forked child: drop batcher threads, pool handles and the watcher that didn't survive the fork
+        
+        Any thread of the parent may have held a lock at fork time, and only the
+        forking thread exists in the child, so every lock the loader owns is
+        replaced: the per-model RLocks and the watcher stop event. Micro-batcher
+        queues and locks go with the batchers, and the pool's lock and queues
+        with the pool. Logging locks are re-initialised by the logging module's
+        own fork hook, and the fitsense log queue by structured_logging's;
+        multiprocessing queues reset themselves in a started child.
+        """
+        self._model_locks = {model_name: threading.RLock() for model_name in self._model_locks}
+        self._watcher_stop = threading.Event()
+        self.batchers = {}
+        self.batching = None
+        self.pool = None
+        self._watcher = None
+    
+    def shutdown(self):
+        """Stop background threads and worker processes"""
+        self.stop_watcher()
+        self.disable_batching()
+        self.disable_process_pool()
+    
+    def predict(self, model_name: str, data, version: Optional[ModelVersion] = None) -> Optional[Any]:
+        """Make a prediction using a specific model (optionally a specific version snapshot)"""
+        if version is None:
+            version = self.get_model_version(model_name)
+        if version is None:
+            logger.warning("Model '%s' not found", model_name)
             return None
         
+        started = time.perf_counter()
         try:
-            # Handle different model types
-            if hasattr(model, 'predict'):
-                return model.predict(data)
-            elif hasattr(model, 'predict_proba'):
-                return model.predict_proba(data)
+            batcher = self.batchers.get(model_name)
+            if batcher is not None and isinstance(data, np.ndarray) and data.ndim == 2 and data.shape[0] == 1:
+                result = batcher.predict(data, version)
             else:
-                print(f"Model '{model_name}' doesn't have predict method")
-                return None
+                result = self._predict_routed(version, data)
         except Exception as e:
-            print(f"Error making prediction with {model_name}: {str(e)}")
+            logger.warning("Error making prediction with %s: %s", model_name, e)
+            result = None
+        
+        elapsed = time.perf_counter() - started
+        for listener in self._prediction_listeners:
+            listener(model_name, elapsed, result is not None)
+        return result
+    
+    def _predict_routed(self, version: ModelVersion, data) -> Optional[Any]:
+        """Run a model version on a pool worker, or in-process if there is no usable worker"""
+        pool = self.pool
+        if pool is not None:
+            try:
+                return pool.predict(version, data)
+            except PoolUnavailable:
+                pass
+        return self._predict_now(version, data)
+    
+    def _predict_now(self, version: ModelVersion, data) -> Optional[Any]:
+        """Run a model version on the calling thread"""
+        if version.compiled is not None:
+            try:
+                return version.compiled.predict(data)
+            except ValueError:
+                # Inputs the engine can't handle (e.g. NaN) go through sklearn
+                pass
+        
+        # Handle different model types
+        model = version.model
+        if hasattr(model, 'predict'):
+            return model.predict(data)
+        elif hasattr(model, 'predict_proba'):
+            return model.predict_proba(data)
+        else:
+            logger.warning("Model '%s' doesn't have predict method", version.model_name)
             return None
 
 # Global model loader instance
 model_loader = ModelLoader()
-
@@ -0,0 +1,121 @@
+import numpy as np
+from typing import Any, List, Optional
+
+from sklearn.ensemble import ExtraTreesRegressor, RandomForestRegressor
+from sklearn.tree import DecisionTreeRegressor, ExtraTreeRegressor
+
+# Estimators whose predict() is the plain average of their trees' leaf values
+SUPPORTED_FORESTS = (RandomForestRegressor, ExtraTreesRegressor)
+SUPPORTED_TREES = (DecisionTreeRegressor, ExtraTreeRegressor)
+
+
+class CompiledForest:
+    """Tree ensemble flattened into contiguous NumPy node arrays.
+    
+    All trees share one set of node arrays; ``roots`` holds the offset of
+    each tree's root node. Leaves point back to themselves so every row can
+    be walked for ``max_depth`` steps without per-tree bookkeeping.
+    """
+    
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, children: np.ndarray,
+                 value: np.ndarray, roots: np.ndarray, max_depth: int, n_features: int,
+                 feature_names: Optional[List[str]] = None):
+        self.feature = feature        # (n_nodes,) split feature per node
+        self.threshold = threshold    # (n_nodes,) split threshold per node
+        self.children = children      # (2 * n_nodes,) left child at 2i, right child at 2i + 1
+        self.value = value            # (n_nodes,) or (n_nodes, n_outputs) leaf values
+        self.roots = roots            # (n_trees,) root node offsets
+        self.max_depth = max_depth
+        self.n_features = n_features
+        self.feature_names = feature_names
+    
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+    
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+    
+    @classmethod
+    def from_estimator(cls, model: Any) -> 'CompiledForest':
+        """Flatten a fitted sklearn tree or forest regressor"""
+        if isinstance(model, SUPPORTED_FORESTS):
+            trees = [estimator.tree_ for estimator in model.estimators_]
+        elif isinstance(model, SUPPORTED_TREES):
+            trees = [model.tree_]
+        else:
+            raise TypeError(f"Unsupported estimator type: {type(model).__name__}")
+        
+        n_nodes = sum(tree.node_count for tree in trees)
+        n_outputs = trees[0].n_outputs
+        
+        feature = np.zeros(n_nodes, dtype=np.intp)
+        threshold = np.zeros(n_nodes, dtype=np.float64)
+        children = np.zeros(2 * n_nodes, dtype=np.intp)
+        value = np.zeros((n_nodes, n_outputs), dtype=np.float64)
+        roots = np.zeros(len(trees), dtype=np.intp)
+        
+        offset = 0
+        for i, tree in enumerate(trees):
+            count = tree.node_count
+            nodes = np.arange(offset, offset + count)
+            is_leaf = tree.children_left == -1
+            
+            roots[i] = offset
+            feature[nodes] = np.where(is_leaf, 0, tree.feature)
+            threshold[nodes] = np.where(is_leaf, 0.0, tree.threshold)
+            children[2 * nodes] = np.where(is_leaf, nodes, tree.children_left + offset)
+            children[2 * nodes + 1] = np.where(is_leaf, nodes, tree.children_right + offset)
+            value[nodes] = tree.value[:, :, 0]
+            offset += count
+        
+        if n_outputs == 1:
+            value = value[:, 0].copy()
+        
+        feature_names = getattr(model, 'feature_names_in_', None)
+        return cls(
+            feature=feature,
+            threshold=threshold,
+            children=children,
+            value=value,
+            roots=roots,
+            max_depth=max(tree.max_depth for tree in trees),
+            n_features=model.n_features_in_,
+            feature_names=list(feature_names) if feature_names is not None else None,
+        )
+    
+    def _as_matrix(self, data) -> np.ndarray:
+        """Convert input rows to the float matrix the trees were trained on"""
+        if self.feature_names is not None and hasattr(data, 'columns'):
+            data = data[self.feature_names]
+        
+        # sklearn compares float32 inputs against float64 thresholds
+        X = np.asarray(data, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got shape {X.shape}")
+        if not np.isfinite(X).all():
+            raise ValueError("Input contains NaN or infinity")
+        return X.astype(np.float64)
+    
+    def predict(self, data) -> np.ndarray:
+        """Predict one row or a batch of rows by walking all trees at once"""
+        X = self._as_matrix(data)
+        n_rows = X.shape[0]
+        
+        rows = np.arange(n_rows)[:, None]
+        nodes = np.repeat(self.roots[None, :], n_rows, axis=0)
+        for _ in range(self.max_depth):
+            go_right = X[rows, self.feature[nodes]] > self.threshold[nodes]
+            nodes = self.children[2 * nodes + go_right]
+        
+        return self.value[nodes].sum(axis=1) / self.n_trees
+
+
+def compile_model(model: Any) -> Optional[CompiledForest]:
+    """Compile a model if its type is supported, otherwise return None"""
+    if isinstance(model, SUPPORTED_FORESTS + SUPPORTED_TREES):
+        return CompiledForest.from_estimator(model)
+    return None
@@ -0,0 +1,99 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from typing import Optional
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HasherBusy(Exception):
+    """The hashing queue is full; the caller should retry later"""
+
+
+class PasswordHasher:
+    """Werkzeug password hashing on a small dedicated thread pool
+    
+    At most ``max_workers`` hashes run at once, so a login spike can't take
+    every request thread's CPU, and at most ``max_queue`` more wait for a
+    worker; beyond that ``HasherBusy`` is raised instead of queueing forever.
+    """
+    
+    def __init__(self, method: str = 'scrypt:32768:8:1', salt_length: int = 16, max_workers: int = 2,
+                 max_queue: int = 32, timeout: float = 10.0):
+        self.method = method
+        self.salt_length = salt_length
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._canonical_method: Optional[str] = None
+        
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.max_queue_depth = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_ms = 0.0
+    
+    def hash(self, password: str) -> str:
+        return self._run(generate_password_hash, password, method=self.method, salt_length=self.salt_length)
+    
+    def verify(self, password_hash: str, password: str) -> bool:
+        return self._run(check_password_hash, password_hash, password)
+    
+    def needs_rehash(self, password_hash: str) -> bool:
+        """True if a stored hash was made with different cost parameters than configured"""
+        return password_hash.split('$', 1)[0] != self.canonical_method
+    
+    @property
+    def canonical_method(self) -> str:
+        # Werkzeug expands shorthands like 'scrypt' or 'pbkdf2'; hash once to see what it stores
+        if self._canonical_method is None:
+            self._canonical_method = self.hash('').split('$', 1)[0]
+        return self._canonical_method
+    
+    def _run(self, fn, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HasherBusy("Too many password hashing requests in progress")
+        
+        with self._lock:
+            self.queued += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queued)
+        
+        def task():
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+                    self.total_ms += elapsed_ms
+                self._slots.release()
+        
+        try:
+            return self._executor.submit(task).result(timeout=self.timeout)
+        except TimeoutError:
+            raise HasherBusy("Password hashing timed out")
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'method': self.method,
+                'workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'queued': self.queued,
+                'running': self.running,
+                'max_queue_depth': self.max_queue_depth,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'avg_ms': round(self.total_ms / self.completed, 1) if self.completed else 0.0
+            }
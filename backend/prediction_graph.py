@@ -0,0 +1,125 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+
+def first_prediction(result: Any) -> Any:
+    """Scalar prediction from a make_prediction result, or None if it failed"""
+    if not isinstance(result, dict) or 'prediction' not in result or result.get('error'):
+        return None
+    prediction = result['prediction']
+    if isinstance(prediction, list) and len(prediction) > 0:
+        prediction = prediction[0]
+    return prediction
+
+
+class PredictionNode:
+    """One step of a prediction graph
+    
+    ``run(data, predictions)`` receives the assessment data with this node's
+    ``inputs`` filled in ({data key: source node}) and the results of every
+    node it depends on. Inputs whose source was skipped or failed are left
+    out, so the node falls back to whatever it derives without them.
+    """
+    
+    def __init__(self, name: str, run: Callable[[dict, dict], Any], inputs: Optional[Dict[str, str]] = None,
+                 after: Iterable[str] = (), fallback: Optional[Callable[[dict, dict, Exception], Any]] = None,
+                 extract: Callable[[Any], Any] = first_prediction):
+        self.name = name
+        self.run = run
+        self.inputs = dict(inputs or {})
+        self.after = tuple(after)
+        self.fallback = fallback
+        self.extract = extract
+    
+    @property
+    def dependencies(self) -> Tuple[str, ...]:
+        return tuple(dict.fromkeys([*self.inputs.values(), *self.after]))
+
+
+class PredictionGraph:
+    """Declarative DAG of prediction steps; independent steps run concurrently"""
+    
+    def __init__(self, nodes: Iterable[PredictionNode] = ()):
+        self.nodes: Dict[str, PredictionNode] = {}
+        for node in nodes:
+            self.add(node)
+    
+    def add(self, node: PredictionNode) -> PredictionNode:
+        if node.name in self.nodes:
+            raise ValueError(f"Duplicate prediction node: {node.name}")
+        self.nodes[node.name] = node
+        return node
+    
+    def run(self, data: dict, executor: Optional[Executor] = None,
+            skip: Iterable[str] = ()) -> Tuple[Dict[str, Any], Dict[str, dict]]:
+        """Run every node once its dependencies finished
+        
+        Returns (results by node name in declaration order, per-node status
+        and wall time in ms). Skipped nodes and dependencies that aren't in
+        the graph count as finished without a result. Without an executor
+        nodes run one after another on the calling thread.
+        """
+        results: Dict[str, Any] = {}
+        timings: Dict[str, dict] = {}
+        finished = set()
+        for name in skip:
+            if name in self.nodes:
+                finished.add(name)
+                timings[name] = {'status': 'skipped', 'ms': 0.0}
+        
+        pending = {name: node for name, node in self.nodes.items() if name not in finished}
+        running: Dict[Future, str] = {}
+        
+        while pending or running:
+            for name, node in list(pending.items()):
+                if any(dep in self.nodes and dep not in finished for dep in node.dependencies):
+                    continue
+                
+                del pending[name]
+                node_data = self._node_data(node, data, results)
+                dep_results = {dep: results[dep] for dep in node.dependencies if dep in results}
+                if executor is not None:
+                    future = executor.submit(self._run_node, node, node_data, dep_results)
+                else:
+                    future = Future()
+                    future.set_result(self._run_node(node, node_data, dep_results))
+                running[future] = name
+            
+            if not running:
+                raise ValueError(f"Prediction graph has a dependency cycle between: {sorted(pending)}")
+            
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                status, result, elapsed_ms = future.result()
+                results[name] = result
+                timings[name] = {'status': status, 'ms': elapsed_ms}
+                finished.add(name)
+        
+        ordered = {name: results[name] for name in self.nodes if name in results}
+        return ordered, {name: timings[name] for name in self.nodes}
+    
+    @staticmethod
+    def _node_data(node: PredictionNode, data: dict, results: Dict[str, Any]) -> dict:
+        node_data = data
+        for key, source in node.inputs.items():
+            value = node.extract(results[source]) if source in results else None
+            if value is not None:
+                if node_data is data:
+                    node_data = data.copy()
+                node_data[key] = value
+        return node_data
+    
+    @staticmethod
+    def _run_node(node: PredictionNode, node_data: dict, dep_results: dict) -> Tuple[str, Any, float]:
+        started = time.perf_counter()
+        try:
+            result = node.run(node_data, dep_results)
+            status = 'failed' if isinstance(result, dict) and result.get('error') else 'ok'
+        except Exception as e:
+            if node.fallback is None:
+                result, status = {'error': f"{node.name} failed: {str(e)}"}, 'failed'
+            else:
+                result, status = node.fallback(node_data, dep_results, e), 'fallback'
+        return status, result, round((time.perf_counter() - started) * 1000, 3)
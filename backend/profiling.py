@@ -0,0 +1,133 @@
+import os
+import re
+import sys
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Optional
+
+# Helper thread ident -> ident of the thread whose work it is running (see AttributedThreadPoolExecutor)
+_working_for: Dict[int, int] = {}
+
+
+def frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+def collapse_stack(frame) -> str:
+    """Root-first 'a;b;c' stack of a frame, the collapsed format flamegraph.pl and speedscope read"""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class AttributedThreadPoolExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor that records which thread submitted the task each worker is running
+    
+    Lets a StackSampler include pool threads only while they work for the
+    profiled thread, not for concurrent requests sharing the pool.
+    """
+    
+    def submit(self, fn, /, *args, **kwargs):
+        owner = threading.get_ident()
+        # Work submitted from a pool thread belongs to whoever that thread works for
+        owner = _working_for.get(owner, owner)
+        return super().submit(self._run_for, owner, fn, *args, **kwargs)
+    
+    @staticmethod
+    def _run_for(owner: int, fn, *args, **kwargs):
+        ident = threading.get_ident()
+        _working_for[ident] = owner
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            del _working_for[ident]
+
+
+class StackSampler:
+    """Sample one thread's Python stack (plus pool threads working for it) at a fixed interval
+    
+    Runs on its own daemon thread between start() and stop(); nothing is
+    installed in the profiled thread, so only sampled requests pay for it.
+    With ``include_helpers``, AttributedThreadPoolExecutor threads are sampled
+    while they run tasks the profiled thread submitted.
+    """
+    
+    def __init__(self, thread_id: int, interval: float = 0.005, include_helpers: bool = False):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.include_helpers = include_helpers
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+    
+    def _run(self):
+        names = {}
+        while not self._stop.wait(self.interval):
+            helpers = []
+            if self.include_helpers:
+                helpers = [ident for ident, owner in list(_working_for.items()) if owner == self.thread_id]
+            frames = sys._current_frames()
+            frame = frames.get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse_stack(frame)] += 1
+            for ident in helpers:
+                helper_frame = frames.get(ident)
+                # The task may have finished between the two snapshots
+                if helper_frame is None or _working_for.get(ident) != self.thread_id:
+                    continue
+                if ident not in names:
+                    names.update((thread.ident, thread.name) for thread in threading.enumerate())
+                name = names.get(ident, 'helper')
+                self.stacks[f"[{name.rsplit('_', 1)[0]}];{collapse_stack(helper_frame)}"] += 1
+            self.samples += 1
+    
+    def collapsed(self) -> str:
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfileStore:
+    """Collapsed-stack profiles on disk, one directory per route, keeping the newest ``max_per_route``"""
+    
+    def __init__(self, directory: str, max_per_route: int = 50):
+        self.directory = directory
+        self.max_per_route = max_per_route
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def route_slug(route: str) -> str:
+        return re.sub(r'[^A-Za-z0-9]+', '_', route).strip('_') or 'root'
+    
+    def save(self, route: str, method: str, status: int, duration_ms: float, collapsed: str) -> str:
+        """Write one profile; returns its path relative to the store directory"""
+        route_dir = os.path.join(self.directory, self.route_slug(route))
+        timestamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+        name = f"{timestamp}-{method}-{status}-{duration_ms:.0f}ms.folded"
+        with self._lock:
+            os.makedirs(route_dir, exist_ok=True)
+            with open(os.path.join(route_dir, name), 'w', encoding='utf-8') as f:
+                f.write(collapsed)
+            self._trim(route_dir)
+        return os.path.join(self.route_slug(route), name)
+    
+    def _trim(self, route_dir: str):
+        # Timestamped names sort oldest first
+        profiles = sorted(name for name in os.listdir(route_dir) if name.endswith('.folded'))
+        for name in profiles[:max(0, len(profiles) - self.max_per_route)]:
+            try:
+                os.remove(os.path.join(route_dir, name))
+            except OSError:
+                pass
@@ -0,0 +1,252 @@
+"""
+Re-score stored assessments with the current models
+
+Streams assessments in id order, scores each chunk with batched predictions
+(run_batch_predictions: vectorized features, one predict call per model,
+calorie analysis) on worker processes, then either writes the new
+predictions back with one transaction per chunk or exports them.
+
+Usage:
+    python rescore_assessments.py --write
+    python rescore_assessments.py --export scores.ndjson
+    python rescore_assessments.py --export scores.csv --workers 4 --chunk-size 1000
+    python rescore_assessments.py --export scores.csv --resume
+
+Progress is checkpointed after every chunk (--checkpoint, default
+rescore.checkpoint.json); --resume continues after the last finished chunk.
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from typing import Iterator, List, Optional, Tuple
+
+from app import (app, db, Assessment, bulk_replace_child_rows, bump_assessment_revisions, model_loader,
+                 run_batch_predictions, serialize_assessment_payload)
+
+# Scalar calorie_analysis values exported as CSV columns
+CALORIE_FIELDS = ['total_calories_per_session', 'weekly_calories', 'current_fat_percentage', 'ideal_fat_percentage',
+                  'current_fat_mass', 'ideal_fat_mass', 'fat_to_lose', 'calories_to_burn_total',
+                  'extra_calories_per_session', 'ideal_water_intake']
+
+def iter_chunks(after_id: int, chunk_size: int) -> Iterator[List[Tuple[int, dict]]]:
+    """Yield [(assessment id, assessment data)] chunks in id order using keyset queries"""
+    last_id = after_id
+    while True:
+        batch = Assessment.query.filter(Assessment.id > last_id).order_by(Assessment.id).limit(chunk_size).all()
+        if not batch:
+            return
+        yield [
+            (assessment.id, {
+                'user_id': assessment.user_id,
+                'name': assessment.name,
+                'age': assessment.age,
+                'gender': assessment.gender,
+                'height': assessment.height,
+                'weight': assessment.weight,
+                'frequency': assessment.frequency,
+                'duration': assessment.duration,
+                'exercises': assessment.get_exercises()
+            })
+            for assessment in batch
+        ]
+        last_id = batch[-1].id
+        # Rows are plain dicts from here on; don't keep ORM objects around
+        db.session.expunge_all()
+
+def score_chunk(chunk: List[Tuple[int, dict]]) -> List[Tuple[int, dict, dict]]:
+    """Run every model and the calorie analysis over one chunk"""
+    records = [record for _, record in chunk]
+    predictions = run_batch_predictions(records)
+    return [(assessment_id, record, record_predictions)
+            for (assessment_id, record), record_predictions in zip(chunk, predictions)]
+
+def init_worker():
+    # Threads, pool handles and DB connections inherited through fork aren't usable here
+    model_loader.reset_after_fork()
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+class DatabaseWriter:
+    """Write re-scored predictions back, one transaction per chunk"""
+    
+    def __init__(self):
+        self.normalized = app.config['ASSESSMENT_STORAGE'] == 'normalized'
+    
+    def write(self, scored: List[Tuple[int, dict, dict]]):
+        mappings = []
+        child_rows = {}
+        for assessment_id, record, predictions in scored:
+            columns, exercise_rows, prediction_rows = serialize_assessment_payload(
+                record['exercises'], predictions, self.normalized
+            )
+            mappings.append({'id': assessment_id, **columns})
+            child_rows[assessment_id] = (exercise_rows, prediction_rows)
+        
+        db.session.bulk_update_mappings(Assessment, mappings)
+        bulk_replace_child_rows(child_rows, list(child_rows))
+        bump_assessment_revisions(list(child_rows))
+        db.session.commit()
+    
+    def position(self) -> Optional[int]:
+        return None
+    
+    def close(self):
+        pass
+
+
+class FileExporter:
+    """Append re-scored predictions to an NDJSON or CSV file"""
+    
+    def __init__(self, path: str, file_format: str, model_names: List[str], resume_offset: Optional[int] = None):
+        self.file_format = file_format
+        self.model_names = model_names
+        if resume_offset is not None and os.path.exists(path):
+            # Drop anything written after the last checkpoint
+            self.file = open(path, 'r+', newline='', encoding='utf-8')
+            self.file.truncate(resume_offset)
+            self.file.seek(resume_offset)
+        else:
+            self.file = open(path, 'w', newline='', encoding='utf-8')
+        
+        if file_format == 'csv':
+            self.writer = csv.writer(self.file)
+            if self.file.tell() == 0:
+                header = ['assessment_id', 'user_id']
+                for model_name in model_names:
+                    header += [model_name, f"{model_name}_version"]
+                self.writer.writerow(header + CALORIE_FIELDS)
+    
+    def write(self, scored: List[Tuple[int, dict, dict]]):
+        for assessment_id, record, predictions in scored:
+            if self.file_format == 'ndjson':
+                self.file.write(json.dumps({
+                    'assessment_id': assessment_id,
+                    'user_id': record['user_id'],
+                    'predictions': predictions
+                }) + '\n')
+            else:
+                self.writer.writerow(self._csv_row(assessment_id, record, predictions))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+    
+    def _csv_row(self, assessment_id: int, record: dict, predictions: dict) -> list:
+        row = [assessment_id, record['user_id']]
+        for model_name in self.model_names:
+            result = predictions.get(model_name) or {}
+            prediction = result.get('prediction')
+            row.append(prediction[0] if isinstance(prediction, list) and prediction else '')
+            row.append(result.get('model_version', ''))
+        analysis = predictions.get('calorie_analysis') or {}
+        return row + [analysis.get(field, '') for field in CALORIE_FIELDS]
+    
+    def position(self) -> Optional[int]:
+        return self.file.tell()
+    
+    def close(self):
+        self.file.close()
+
+
+def load_checkpoint(path: str) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def save_checkpoint(path: str, checkpoint: dict):
+    # Write-then-rename so an interrupted run never leaves a half-written checkpoint
+    with open(f"{path}.tmp", 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(f"{path}.tmp", path)
+
+def rescore(args) -> dict:
+    checkpoint = load_checkpoint(args.checkpoint) if args.resume else None
+    target = 'db' if args.write else args.export
+    if checkpoint is not None and checkpoint['target'] != target:
+        raise SystemExit(f"Checkpoint {args.checkpoint} belongs to a run writing to {checkpoint['target']}")
+    
+    after_id = checkpoint['last_id'] if checkpoint else 0
+    processed = checkpoint['processed'] if checkpoint else 0
+    remaining = Assessment.query.filter(Assessment.id > after_id).count()
+    print(f"Re-scoring {remaining} assessments after id {after_id} with {args.workers} workers")
+    
+    if args.write:
+        sink = DatabaseWriter()
+    else:
+        file_format = args.format or ('csv' if args.export.endswith('.csv') else 'ndjson')
+        model_names = checkpoint['model_names'] if checkpoint else model_loader.list_models()
+        sink = FileExporter(args.export, file_format, model_names,
+                            resume_offset=checkpoint['offset'] if checkpoint else None)
+    
+    pool = None
+    if args.workers > 1:
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+        pool = context.Pool(args.workers, initializer=init_worker)
+    
+    started = time.time()
+    done = 0
+    
+    def finish(scored: List[Tuple[int, dict, dict]]):
+        nonlocal done, processed
+        sink.write(scored)
+        done += len(scored)
+        processed += len(scored)
+        save_checkpoint(args.checkpoint, {
+            'target': target,
+            'last_id': scored[-1][0],
+            'processed': processed,
+            'offset': sink.position(),
+            'model_names': getattr(sink, 'model_names', None)
+        })
+        
+        elapsed = time.time() - started
+        rate = done / elapsed if elapsed > 0 else 0.0
+        eta = (remaining - done) / rate if rate > 0 else 0.0
+        print(f"{done}/{remaining} assessments ({rate:.0f}/s, ETA {eta:.0f}s), last id {scored[-1][0]}")
+    
+    try:
+        # Chunks are read on this thread; up to two per worker are scored ahead of the writer
+        in_flight = deque()
+        for chunk in iter_chunks(after_id, args.chunk_size):
+            if pool is None:
+                finish(score_chunk(chunk))
+                continue
+            in_flight.append(pool.apply_async(score_chunk, (chunk,)))
+            if len(in_flight) >= args.workers * 2:
+                finish(in_flight.popleft().get())
+        while in_flight:
+            finish(in_flight.popleft().get())
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+        sink.close()
+    
+    elapsed = time.time() - started
+    return {'processed': done, 'seconds': round(elapsed, 1), 'per_second': round(done / elapsed, 1) if elapsed else 0.0}
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-score stored assessments with the current models')
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument('--write', action='store_true', help='Write new predictions back to the database')
+    output.add_argument('--export', metavar='PATH', help='Export predictions to an NDJSON or CSV file')
+    parser.add_argument('--format', choices=['ndjson', 'csv'], help='Export format (default: from the file extension)')
+    parser.add_argument('--chunk-size', type=int, default=500, help='Assessments scored per batch')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Scoring processes (1 scores in-process)')
+    parser.add_argument('--checkpoint', default='rescore.checkpoint.json', help='Checkpoint file')
+    parser.add_argument('--resume', action='store_true', help='Continue after the last checkpointed chunk')
+    args = parser.parse_args()
+    
+    with app.app_context():
+        summary = rescore(args)
+    
+    print(f"✅ Re-scored {summary['processed']} assessments in {summary['seconds']}s ({summary['per_second']}/s)")
+
+if __name__ == "__main__":
+    main()
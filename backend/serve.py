@@ -0,0 +1,45 @@
+"""
+Production launcher for the FitSense API (ASGI, uvicorn)
+
+Usage:
+    python serve.py
+    python serve.py --workers 4 --port 8000
+
+Missing tables are created once, in a short-lived process, before uvicorn
+starts the workers. Each worker is a separate process with its own models,
+caches and database pool; see asgi.py for the per-process thread lanes.
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+
+import uvicorn
+
+def init_database():
+    from app import app, create_tables
+    with app.app_context():
+        create_tables()
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the FitSense API with uvicorn')
+    parser.add_argument('--host', default=os.environ.get('FITSENSE_HOST', '0.0.0.0'), help='Bind address')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('FITSENSE_PORT', 5000)), help='Bind port')
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('FITSENSE_WORKERS', os.cpu_count() or 1)),
+                        help='Worker processes')
+    parser.add_argument('--log-level', default=os.environ.get('FITSENSE_LOG_LEVEL', 'info'), help='uvicorn log level')
+    args = parser.parse_args()
+    
+    # Spawned, so this process doesn't keep a copy of the app and its models
+    init = multiprocessing.get_context('spawn').Process(target=init_database)
+    init.start()
+    init.join()
+    if init.exitcode != 0:
+        sys.exit(f"Database initialisation failed (exit code {init.exitcode})")
+    
+    uvicorn.run('asgi:application', host=args.host, port=args.port, workers=args.workers,
+                log_level=args.log_level, lifespan='on')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+from typing import Optional
+
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+
+
+class SessionTokens:
+    """Signed, stateless session tokens carrying the serialized user
+    
+    Validating a token needs only the secret key, not the database. Tokens
+    can't be revoked individually; they expire after ``max_age`` seconds and
+    all of them become invalid when the secret key changes.
+    """
+    
+    def __init__(self, secret_key: str, max_age: int = 7 * 24 * 3600, salt: str = 'fitsense-session'):
+        self.max_age = max_age
+        self._serializer = URLSafeTimedSerializer(secret_key, salt=salt)
+    
+    def issue(self, user: dict) -> str:
+        return self._serializer.dumps({'user': user})
+    
+    def verify(self, token: str) -> Optional[dict]:
+        """The user a token was issued for, or None if it is forged or expired"""
+        try:
+            payload = self._serializer.loads(token, max_age=self.max_age)
+        except (SignatureExpired, BadSignature):
+            return None
+        return payload.get('user') if isinstance(payload, dict) else None
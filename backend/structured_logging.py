@@ -0,0 +1,236 @@
+"""
+Non-blocking logging for the FitSense backend
+
+Records go through a bounded queue to a background writer thread, which
+serializes and writes them. Once a record passes the level and per-route
+checks, the calling thread renders its message and redacts a copy of its
+fields, so only plain values are queued and later changes to the logged
+objects never show up in the output. Disabled levels cost one isEnabledFor
+check, so pass arguments lazily:
+
+    logger.debug("Received assessment", extra={'fields': {'payload': data}})
+    logger.warning("Error predicting exercise calories: %s", e)
+
+Configured from the environment when this module is first imported, before
+the model loader logs its startup messages:
+
+    FITSENSE_LOG_LEVEL               base level (default INFO)
+    FITSENSE_LOG_FORMAT              text or json (default text)
+    FITSENSE_LOG_ROUTE_LEVELS        per-route levels, e.g. /api/health=WARNING,/api/assessments=DEBUG
+    FITSENSE_LOG_SAMPLE_RATES        per-route fraction of sub-WARNING records kept, e.g. /api/assessments=0.1
+    FITSENSE_LOG_MAX_FIELD_LENGTH    longest string/list kept in logged fields (default 200)
+    FITSENSE_LOG_QUEUE_SIZE          records buffered before new ones are dropped (default 10000)
+"""
+
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import traceback
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+try:
+    from flask import has_request_context, request
+except ImportError:  # pragma: no cover - only used outside the app
+    has_request_context = None
+
+# Keys whose values never reach the log output
+REDACTED_KEYS = {'password', 'password_hash', 'token', 'email', 'name', 'secret', 'authorization', 'x-admin-token'}
+
+ROOT_LOGGER = 'fitsense'
+
+
+def redact(value: Any, max_length: int = 200, depth: int = 0) -> Any:
+    """Copy of a payload with sensitive keys masked and long strings/lists truncated"""
+    if depth > 6:
+        return '...'
+    if isinstance(value, dict):
+        return {
+            key: '[REDACTED]' if str(key).lower() in REDACTED_KEYS else redact(item, max_length, depth + 1)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        items = [redact(item, max_length, depth + 1) for item in value[:max_length]]
+        if len(value) > max_length:
+            items.append(f"... (+{len(value) - max_length} more)")
+        return items
+    if isinstance(value, str) and len(value) > max_length:
+        return value[:max_length] + f"... (+{len(value) - max_length} chars)"
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    return redact(str(value), max_length, depth + 1)
+
+def current_route() -> str:
+    if has_request_context is not None and has_request_context() and request.url_rule is not None:
+        return request.url_rule.rule
+    return ''
+
+def parse_route_map(spec: str, convert) -> Dict[str, Any]:
+    """'route=value,route=value' -> {route: convert(value)}"""
+    result = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        route, _, value = item.rpartition('=')
+        if route:
+            result[route.strip()] = convert(value.strip())
+    return result
+
+
+class RouteFilter(logging.Filter):
+    """Per-route level and sampling, evaluated on the calling thread before a record is queued"""
+    
+    def __init__(self, base_level: int, route_levels: Dict[str, int], sample_rates: Dict[str, float]):
+        super().__init__()
+        self.base_level = base_level
+        self.route_levels = route_levels
+        self.sample_rates = sample_rates
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        route = current_route()
+        record.route = route
+        if record.levelno < self.route_levels.get(route, self.base_level):
+            return False
+        # Warnings and errors are always kept
+        rate = self.sample_rates.get(route)
+        if rate is not None and record.levelno < logging.WARNING and random.random() >= rate:
+            return False
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records when the queue is full instead of blocking or raising"""
+    
+    def __init__(self, log_queue: queue.Queue, max_field_length: int = 200):
+        super().__init__(log_queue)
+        self.max_field_length = max_field_length
+        self.dropped = 0
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only called for records that passed the filters; snapshot everything the writer thread will read
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        fields = getattr(record, 'fields', None)
+        if fields:
+            record.fields = redact(fields, self.max_field_length)
+        if record.exc_info:
+            record.exc_text = ''.join(traceback.format_exception(*record.exc_info)).rstrip()
+            record.exc_info = None
+        return record
+    
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class StructuredFormatter(logging.Formatter):
+    """Text or JSON lines from records prepared by DroppingQueueHandler (``fields`` already redacted)"""
+    
+    def __init__(self, output_format: str = 'text'):
+        super().__init__()
+        self.output_format = output_format
+    
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        fields = getattr(record, 'fields', None)
+        route = getattr(record, 'route', '')
+        
+        if self.output_format == 'json':
+            entry = {
+                'ts': datetime.utcfromtimestamp(record.created).isoformat(timespec='milliseconds') + 'Z',
+                'level': record.levelname,
+                'logger': record.name,
+                'message': message
+            }
+            if route:
+                entry['route'] = route
+            if fields:
+                entry['fields'] = fields
+            if record.exc_text:
+                entry['exception'] = record.exc_text
+            return json.dumps(entry, default=str)
+        
+        line = message
+        if route:
+            line = f"[{route}] {line}"
+        if fields:
+            line = f"{line} {json.dumps(fields, default=str)}"
+        if record.exc_text:
+            line = f"{line}\n{record.exc_text}"
+        return line
+
+
+class LoggingConfig:
+    """The queue, writer thread and handler installed on the ``fitsense`` logger"""
+    
+    def __init__(self, level: int = logging.INFO, output_format: str = 'text',
+                 route_levels: Optional[Dict[str, int]] = None, sample_rates: Optional[Dict[str, float]] = None,
+                 max_field_length: int = 200, queue_size: int = 10000, stream=None):
+        self.queue_size = queue_size
+        self.stream = stream or sys.stdout
+        self.output_format = output_format
+        route_levels = {route: value for route, value in (route_levels or {}).items() if isinstance(value, int)}
+        
+        self.logger = logging.getLogger(ROOT_LOGGER)
+        # The logger level is the most verbose level any route wants; RouteFilter narrows it per route
+        self.logger.setLevel(min([level] + list(route_levels.values())))
+        self.logger.propagate = False
+        
+        self.handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size), max_field_length)
+        self.handler.addFilter(RouteFilter(level, route_levels, sample_rates or {}))
+        self.logger.addHandler(self.handler)
+        self.listener: Optional[QueueListener] = None
+        self.start()
+    
+    def start(self):
+        writer = logging.StreamHandler(self.stream)
+        writer.setFormatter(StructuredFormatter(self.output_format))
+        self.listener = QueueListener(self.handler.queue, writer, respect_handler_level=False)
+        self.listener.start()
+    
+    def stop(self):
+        """Flush queued records and stop the writer thread"""
+        listener, self.listener = self.listener, None
+        if listener is not None:
+            listener.stop()
+    
+    def restart_after_fork(self):
+        # The writer thread didn't survive the fork and the queue's locks may be held; start fresh
+        self.handler.queue = queue.Queue(maxsize=self.queue_size)
+        self.listener = None
+        self.start()
+    
+    def stats(self) -> dict:
+        return {
+            'queued': self.handler.queue.qsize(),
+            'dropped': self.handler.dropped
+        }
+
+
+def configure_from_env() -> LoggingConfig:
+    level = logging.getLevelName(os.environ.get('FITSENSE_LOG_LEVEL', 'INFO').upper())
+    config = LoggingConfig(
+        level=level if isinstance(level, int) else logging.INFO,
+        output_format=os.environ.get('FITSENSE_LOG_FORMAT', 'text'),
+        route_levels=parse_route_map(os.environ.get('FITSENSE_LOG_ROUTE_LEVELS', ''),
+                                     lambda value: logging.getLevelName(value.upper())),
+        sample_rates=parse_route_map(os.environ.get('FITSENSE_LOG_SAMPLE_RATES', ''), float),
+        max_field_length=int(os.environ.get('FITSENSE_LOG_MAX_FIELD_LENGTH', 200)),
+        queue_size=int(os.environ.get('FITSENSE_LOG_QUEUE_SIZE', 10000))
+    )
+    atexit.register(config.stop)
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=config.restart_after_fork)
+    return config
+
+logging_config = configure_from_env()
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
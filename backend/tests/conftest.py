@@ -0,0 +1,51 @@
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+# The tests run against their own database, never the app's; set before anything imports app
+_DB_DIR = tempfile.mkdtemp(prefix='fitsense-test-')
+atexit.register(shutil.rmtree, _DB_DIR, ignore_errors=True)
+os.environ['FITSENSE_DATABASE_URL'] = f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+os.environ.setdefault('FITSENSE_PASSWORD_HASH_METHOD', 'pbkdf2')
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+@pytest.fixture
+def client():
+    """Test client over freshly created, empty tables"""
+    from app import app, assessment_response_cache, create_tables, db
+    with app.app_context():
+        db.drop_all()
+        create_tables()
+        if assessment_response_cache is not None:
+            assessment_response_cache.clear()
+        yield app.test_client()
+
+@pytest.fixture(scope='session')
+def example_loader(tmp_path_factory):
+    """ModelLoader over small forests fitted to create_example_models.py's synthetic data"""
+    import pickle
+    from sklearn.ensemble import RandomForestRegressor
+    from create_example_models import generate_training_data
+    from models.model_loader import ModelLoader
+    
+    models_dir = tmp_path_factory.mktemp('models')
+    for model_name, (X, y) in generate_training_data(n_samples=400, seed=0).items():
+        model = RandomForestRegressor(n_estimators=10, max_depth=8, random_state=0).fit(X, y)
+        with open(models_dir / f"{model_name}.pkl", 'wb') as f:
+            pickle.dump(model, f)
+    return ModelLoader(models_dir=str(models_dir), lazy=False)
+
+@pytest.fixture(params=['models', 'no models'])
+def loader(request, example_loader, monkeypatch):
+    """The app's model loader, swapped for the example models or for an empty loader (fallback paths)"""
+    import app
+    from models.model_loader import ModelLoader
+    
+    loader = example_loader if request.param == 'models' else ModelLoader(models_dir=os.path.join(_DB_DIR, 'empty'))
+    monkeypatch.setattr(app, 'model_loader', loader)
+    return loader
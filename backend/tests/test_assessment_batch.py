@@ -0,0 +1,39 @@
+from app import Assessment
+
+def assessment(user_id: int, weight: float) -> dict:
+    return {
+        'user_id': user_id,
+        'name': f"User {user_id}",
+        'age': 30,
+        'gender': 'female',
+        'height': 1.7,
+        'weight': weight,
+        'frequency': 3,
+        'duration': 1,
+        'exercises': [{'exercise': 'Squats', 'sets': 3, 'reps': 12}]
+    }
+
+def test_duplicate_user_in_batch_reports_superseded_records(client):
+    records = [assessment(1, 60), assessment(2, 70), assessment(1, 65), {'user_id': 3}, assessment(1, 68)]
+    response = client.post('/api/assessments/batch', json={'assessments': records})
+    assert response.status_code == 200
+    body = response.get_json()
+    
+    assert (body['created'], body['updated'], body['failed']) == (2, 0, 3)
+    assert [result['index'] for result in body['results']] == [1, 4]
+    assert [error['index'] for error in body['errors']] == [0, 2, 3]
+    assert body['errors'][0]['error'] == 'duplicate user_id in batch, superseded by index 4'
+    assert body['errors'][1]['error'] == 'duplicate user_id in batch, superseded by index 4'
+    
+    rows = {row.user_id: row for row in Assessment.query.all()}
+    assert sorted(rows) == [1, 2]
+    assert rows[1].weight == 68
+    assert {result['user_id']: result['assessment_id'] for result in body['results']} == {1: rows[1].id, 2: rows[2].id}
+
+def test_duplicate_user_in_batch_updates_existing_assessment_once(client):
+    assert client.post('/api/assessments', json=assessment(1, 60)).status_code == 201
+    
+    body = client.post('/api/assessments/batch', json={'assessments': [assessment(1, 62), assessment(1, 64)]}).get_json()
+    assert (body['created'], body['updated'], body['failed']) == (0, 1, 1)
+    assert Assessment.query.count() == 1
+    assert Assessment.query.one().weight == 64
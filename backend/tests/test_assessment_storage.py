@@ -0,0 +1,40 @@
+from app import Assessment, assessment_response_cache
+from migrate_assessment_storage import create_schema, migrate
+
+ASSESSMENT = {
+    'user_id': 1,
+    'name': 'Test User',
+    'age': 30,
+    'gender': 'male',
+    'height': 1.8,
+    'weight': 80,
+    'frequency': 3,
+    'duration': 1,
+    'exercises': [
+        {'id': 'a1b2', 'exercise': 'Squats', 'sets': '4', 'reps': '12', 'notes': 'slow'},
+        {'id': 7, 'exercise': 'Burpees', 'sets': 3, 'reps': 15},
+        {'id': 'c3d4', 'exercise': '', 'sets': '', 'reps': 'max'},
+        {'exercise': 'Push-ups', 'reps': 20}
+    ]
+}
+
+def latest_assessment(client) -> dict:
+    if assessment_response_cache is not None:
+        assessment_response_cache.clear()
+    response = client.get('/api/assessments/latest/1')
+    assert response.status_code == 200
+    return response.get_json()
+
+def test_json_normalized_json_round_trip(client):
+    create_schema()
+    assert client.post('/api/assessments', json=ASSESSMENT).status_code == 201
+    original = latest_assessment(client)
+    assert original['assessment']['exercises'] == ASSESSMENT['exercises']
+    
+    assert migrate('normalized') == 1
+    assert Assessment.query.one().is_normalized
+    assert latest_assessment(client) == original
+    
+    assert migrate('json') == 1
+    assert not Assessment.query.one().is_normalized
+    assert latest_assessment(client) == original
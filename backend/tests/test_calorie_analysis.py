@@ -0,0 +1,106 @@
+import math
+
+from app import (calculate_basic_calorie_burn, calculate_basic_exercise_calories, calculate_calorie_analysis,
+                 ideal_fat_percentage, predict_water_intake_for_ideal_fat, prepare_features)
+
+# Sets and reps sit inside the synthetic training ranges so the example burnCal model tells them apart
+BASE = {'age': 34, 'gender': 'female', 'height': 1.68, 'weight': 72.5, 'frequency': 4, 'duration': 1.25}
+
+PAYLOADS = [
+    {**BASE, 'exercises': [{'exercise': 'Squats', 'sets': 6, 'reps': 60},
+                           {'exercise': 'Push-ups', 'sets': 8, 'reps': 120},
+                           {'exercise': 'Burpees', 'sets': 12, 'reps': 200}]},
+    # String sets/reps, an unknown exercise and entries the analysis skips
+    {**BASE, 'gender': 'male', 'age': 58, 'weight': 96, 'exercises': [
+        {'exercise': 'Deadlift', 'sets': '10', 'reps': '150'},
+        {'exercise': 'Not An Exercise', 'sets': 6, 'reps': 80},
+        {'exercise': 'Plank', 'sets': '', 'reps': 1},
+        {'exercise': '', 'sets': 3, 'reps': 10}]},
+    {**BASE, 'frequency': 0, 'exercises': [{'exercise': 'Jumping Jacks', 'sets': 5, 'reps': 100}]},
+    {**BASE, 'exercises': []}
+]
+
+PREDICTIONS = [
+    {},
+    {'fat_model_tuned': {'prediction': [31.4]}, 'burnCal_model_tuned': {'prediction': [412.0]},
+     'water_intake_model_tuned': {'prediction': [2.7]}},
+    {'fat_model_tuned': {'prediction': [12.0]}, 'burnCal_model_tuned': {'error': 'failed'}}
+]
+
+def reference_exercise_calories(loader, data: dict, exercise: dict) -> float:
+    """One burnCal prediction per exercise, as the analysis did before it was vectorized"""
+    weight, duration = float(data['weight']), float(data['duration'])
+    if 'burnCal_model_tuned' not in loader.list_models():
+        return calculate_basic_exercise_calories(exercise, weight, duration)
+    features = prepare_features({**data, 'exercises': [exercise]}, 'burnCal_model_tuned')
+    prediction = loader.predict('burnCal_model_tuned', features)
+    if prediction is None or len(prediction) == 0:
+        return calculate_basic_exercise_calories(exercise, weight, duration)
+    return float(prediction[0])
+
+def reference_analysis(loader, data: dict, predictions: dict, duration_days: float = 30) -> dict:
+    weight = float(data['weight'])
+    frequency = int(data['frequency'])
+    duration = float(data['duration'])
+    ideal_fat_pct = ideal_fat_percentage(int(data['age']), data['gender'])
+    
+    fat_percentage = (predictions.get('fat_model_tuned') or {}).get('prediction', [ideal_fat_pct])[0]
+    total_calories = (predictions.get('burnCal_model_tuned') or {}).get('prediction', [None])[0]
+    if total_calories is None:
+        total_calories = calculate_basic_calorie_burn(weight, duration, frequency)
+    weekly_calories = total_calories * frequency if frequency > 0 else 0
+    current_fat_mass = fat_percentage / 100 * weight
+    ideal_fat_mass = ideal_fat_pct / 100 * weight
+    fat_to_lose = current_fat_mass - ideal_fat_mass
+    calories_to_burn_total = fat_to_lose * 7700
+    extra_per_session = (calories_to_burn_total - weekly_calories) / frequency if frequency > 0 else 0
+    
+    rows = []
+    for exercise in data['exercises']:
+        if not (exercise.get('exercise') and exercise.get('sets') and exercise.get('reps')):
+            continue
+        calories = reference_exercise_calories(loader, data, exercise)
+        sets, reps = int(exercise['sets']), int(exercise['reps'])
+        total_reps = sets * reps
+        cal_per_rep = calories / total_reps if total_reps > 0 else 0
+        rows.append({'exercise': exercise['exercise'], 'current_sets': sets, 'current_reps': reps,
+                     'calories_burned': round(calories, 1), 'cal_per_rep': cal_per_rep, 'total_reps': total_reps,
+                     'weight': (cal_per_rep ** 0.5) * (total_reps ** 0.5)})
+    total_weight = sum(row['weight'] for row in rows)
+    
+    exercise_analysis = []
+    for row in rows:
+        extra_calories = extra_per_session * (row['weight'] / total_weight) if total_weight > 0 else 0
+        extra_reps = round(extra_calories / row['cal_per_rep']) if row['cal_per_rep'] > 0 else 0
+        exercise_analysis.append({
+            **row,
+            'cal_per_rep': round(row['cal_per_rep'], 3),
+            'extra_reps': extra_reps,
+            'new_total_reps': row['total_reps'] + extra_reps,
+            'extra_calories_target': round(extra_calories, 1),
+            'weight': round(row['weight'], 3),
+            'extra_reps_total': extra_reps,
+            'daily_increase': math.ceil(extra_reps / duration_days) if duration_days > 0 else 0,
+            'target_total_reps': row['total_reps'] + extra_reps
+        })
+    
+    return {
+        'total_calories_per_session': round(total_calories, 1),
+        'weekly_calories': round(weekly_calories, 1),
+        'current_fat_percentage': round(fat_percentage, 1),
+        'ideal_fat_percentage': ideal_fat_pct,
+        'current_fat_mass': round(current_fat_mass, 2),
+        'ideal_fat_mass': round(ideal_fat_mass, 2),
+        'fat_to_lose': round(fat_to_lose, 2),
+        'calories_to_burn_total': round(calories_to_burn_total, 0),
+        'extra_calories_per_session': round(extra_per_session, 1),
+        'exercise_analysis': exercise_analysis,
+        'ideal_water_intake': round(predict_water_intake_for_ideal_fat(data, predictions), 1)
+    }
+
+def test_calorie_analysis_matches_scalar_reference(loader):
+    for data in PAYLOADS:
+        for predictions in PREDICTIONS:
+            for duration_days in (30, 7):
+                expected = reference_analysis(loader, data, predictions, duration_days)
+                assert calculate_calorie_analysis(data, predictions, duration_days=duration_days) == expected
@@ -0,0 +1,34 @@
+import numpy as np
+
+from models.mapped_forest import export_forest, index_dtype, load_forest, node_index_dtype
+from models.tree_engine import CompiledForest
+
+def test_index_dtype_boundary():
+    assert index_dtype(0) == np.dtype('<i4')
+    assert index_dtype(2 ** 31 - 1) == np.dtype('<i4')
+    assert index_dtype(2 ** 31) == np.dtype('<i8')
+
+def test_node_index_dtype_leaves_room_for_child_offsets():
+    # The largest child offset predict() computes is 2 * (n_nodes - 1) + 1
+    assert node_index_dtype(2 ** 30 - 1) == np.dtype('<i4')
+    assert node_index_dtype(2 ** 30) == np.dtype('<i8')
+    for n_nodes in (2 ** 30 - 1, 2 ** 30):
+        assert 2 * (n_nodes - 1) + 1 <= np.iinfo(node_index_dtype(n_nodes)).max
+
+def test_export_uses_node_index_dtype(tmp_path):
+    # A single leaf: both children point back to node 0
+    forest = CompiledForest(
+        feature=np.zeros(1, dtype=np.intp),
+        threshold=np.zeros(1),
+        children=np.zeros(2, dtype=np.intp),
+        value=np.array([1.5]),
+        roots=np.zeros(1, dtype=np.intp),
+        max_depth=0,
+        n_features=2
+    )
+    path = str(tmp_path / 'leaf.forest')
+    export_forest(forest, path)
+    mapped = load_forest(path)
+    assert mapped.children.dtype == node_index_dtype(1)
+    assert mapped.roots.dtype == node_index_dtype(1)
+    assert mapped.predict(np.zeros((3, 2))).tolist() == [1.5, 1.5, 1.5]
@@ -0,0 +1,63 @@
+import itertools
+
+from app import prepare_features, run_scenario_sweep
+from test_calorie_analysis import reference_analysis
+
+BASE = {'age': 41, 'gender': 'male', 'height': 1.82, 'weight': 88, 'frequency': 3, 'duration': 1.5,
+        'exercises': [{'exercise': 'Squats', 'sets': 6, 'reps': 80},
+                      {'exercise': 'Push-ups', 'sets': '8', 'reps': '120'},
+                      {'exercise': 'Plank', 'sets': 4, 'reps': ''},
+                      {'exercise': 'Not An Exercise', 'sets': 10, 'reps': 150}]}
+
+SWEEPS = [
+    ({'weight': [60.0, 85.5], 'frequency': [1, 3, 5]}, 30),
+    ({'sets': [6, 10], 'reps': [60, 150], 'duration': [0.75, 2.0]}, 30),
+    ({'duration_days': [7.0, 45.0], 'reps': [90]}, 14)
+]
+
+def scenario_assessment(base: dict, parameters: dict) -> dict:
+    """The assessment one scenario stands for: swept fields replaced, sets / reps on every valid exercise"""
+    data = {**base, **{name: parameters[name] for name in ('weight', 'duration', 'frequency') if name in parameters}}
+    data['exercises'] = [
+        {**exercise, **{name: parameters[name] for name in ('sets', 'reps') if name in parameters}}
+        if exercise.get('exercise') and exercise.get('sets') and exercise.get('reps') else exercise
+        for exercise in base['exercises']
+    ]
+    return data
+
+def reference_predictions(loader, data: dict) -> dict:
+    """fat first, then water and burnCal on its prediction, one model call each"""
+    predictions = {}
+    chained = dict(data)
+    for model_name in ('fat_model_tuned', 'water_intake_model_tuned', 'burnCal_model_tuned'):
+        if model_name not in loader.list_models():
+            continue
+        prediction = loader.predict(model_name, prepare_features(chained, model_name)).tolist()
+        predictions[model_name] = {'prediction': prediction}
+        if model_name == 'fat_model_tuned':
+            chained['predicted_fat_percentage'] = prediction[0]
+    return predictions
+
+def test_scenario_sweep_matches_scalar_reference(loader):
+    for values, duration_days in SWEEPS:
+        result = run_scenario_sweep(BASE, values, duration_days)
+        scenarios = [dict(zip(values, combination)) for combination in itertools.product(*values.values())]
+        assert result['scenarios'] == len(scenarios)
+        assert result['parameters'] == {name: [scenario[name] for scenario in scenarios] for name in values}
+        
+        for i, parameters in enumerate(scenarios):
+            data = scenario_assessment(BASE, parameters)
+            predictions = reference_predictions(loader, data)
+            expected = reference_analysis(loader, data, predictions, parameters.get('duration_days', duration_days))
+            
+            assert {name: column[i] for name, column in result['predictions'].items()} == {
+                name: prediction['prediction'][0] for name, prediction in predictions.items()
+            }
+            assert {name: column[i] for name, column in result['calorie_analysis'].items()} == {
+                name: value for name, value in expected.items() if name != 'exercise_analysis'
+            }
+            exercise_analysis = result['exercise_analysis']
+            assert exercise_analysis['exercise'] == [row['exercise'] for row in expected['exercise_analysis']]
+            for name, column in exercise_analysis.items():
+                if name != 'exercise':
+                    assert column[i] == [row[name] for row in expected['exercise_analysis']], name
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import ExtraTreesRegressor, GradientBoostingRegressor, RandomForestRegressor
+from sklearn.tree import DecisionTreeRegressor
+
+from models.model_loader import ModelVersion, model_loader
+from models.tree_engine import CompiledForest, compile_model
+
+FEATURES = ['Age', 'Gender', 'Weight (kg)', 'BMI']
+
+def training_data(n_rows: int = 300, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([
+        rng.integers(18, 70, n_rows),
+        rng.integers(0, 2, n_rows),
+        rng.uniform(50, 110, n_rows).round(1),
+        rng.uniform(18, 35, n_rows)
+    ]).astype(np.float64)
+    y = 0.3 * X[:, 3] + 5 * X[:, 1] + 0.05 * X[:, 0] + rng.normal(0, 1, n_rows)
+    return pd.DataFrame(X, columns=FEATURES), y
+
+def edge_rows(forest: CompiledForest, n_rows: int = 400, seed: int = 1) -> np.ndarray:
+    """Rows on, and one float step either side of, the split thresholds"""
+    rng = np.random.default_rng(seed)
+    is_split = forest.children[0::2] != np.arange(forest.n_nodes)
+    X = rng.uniform(0, 120, (n_rows, forest.n_features))
+    for column in range(forest.n_features):
+        thresholds = forest.threshold[is_split & (forest.feature == column)]
+        if thresholds.size:
+            picked = rng.choice(thresholds, n_rows)
+            X[:, column] = np.nextafter(picked, rng.choice([-np.inf, 0.0, np.inf], n_rows))
+            X[::3, column] = picked[::3]
+    return X
+
+def version_of(model) -> ModelVersion:
+    return ModelVersion('test_model', 'test', model, compile_model(model), '', 0, 0, 0.0)
+
+def test_compiled_forest_matches_sklearn():
+    X, y = training_data()
+    models = [
+        RandomForestRegressor(n_estimators=20, max_depth=8, random_state=0),
+        ExtraTreesRegressor(n_estimators=10, random_state=0),
+        DecisionTreeRegressor(max_depth=6, random_state=0)
+    ]
+    for model in models:
+        model.fit(X, y)
+        compiled = compile_model(model)
+        assert compiled is not None
+        
+        rows = pd.DataFrame(np.vstack([X.to_numpy(), edge_rows(compiled)]), columns=FEATURES)
+        np.testing.assert_allclose(compiled.predict(rows), model.predict(rows), rtol=1e-12, atol=1e-12)
+        # One row at a time and float32-rounded inputs take the same path as sklearn
+        np.testing.assert_allclose(compiled.predict(rows.iloc[[5]]), model.predict(rows.iloc[[5]]))
+        single = rows.iloc[:1].astype(np.float32)
+        np.testing.assert_allclose(compiled.predict(single), model.predict(single))
+
+def test_unsupported_models_use_sklearn():
+    X, y = training_data()
+    model = GradientBoostingRegressor(n_estimators=30, max_depth=3, random_state=0).fit(X, y)
+    assert compile_model(model) is None
+    np.testing.assert_array_equal(model_loader._predict_now(version_of(model), X), model.predict(X))
+
+def outcome(predict, rows):
+    try:
+        return predict(rows).tolist()
+    except ValueError as e:
+        return type(e)
+
+def test_nan_inputs_match_sklearn():
+    X, y = training_data()
+    rows = X.iloc[:20].copy()
+    rows.iloc[::4, 2] = np.nan
+    for model in (RandomForestRegressor(n_estimators=10, random_state=0), GradientBoostingRegressor(random_state=0)):
+        model.fit(X, y)
+        version = version_of(model)
+        if version.compiled is not None:
+            assert outcome(version.compiled.predict, rows) is ValueError
+        # The loader hands NaN rows to sklearn, which predicts them or rejects them the same way
+        assert outcome(lambda data: model_loader._predict_now(version, data), rows) == outcome(model.predict, rows)